@@ -0,0 +1,220 @@
+import json
+import sqlite3
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, ClassVar, Self
+from xml.etree import ElementTree
+
+from justin_utils.exif import HeaderExif, parse_exif
+from justin_utils.filesystem import File
+from justin_utils.sources import Source, parse_sources
+
+CatalogRow = tuple[str, str, str, str, str, str, str | None, str | None, str | None, int | None, str | None]
+
+
+@dataclass(frozen=True)
+class Query:
+    # since is inclusive and until is exclusive, so consecutive ranges never overlap
+    since: datetime | None = None
+    until: datetime | None = None
+    camera: str | None = None
+    lens: str | None = None
+    extension: str | None = None
+    min_rating: int | None = None
+    folder: Path | None = None
+
+    def where(self) -> tuple[str, list[Any]]:
+        conditions = []
+        params: list[Any] = []
+
+        if self.since is not None:
+            conditions.append("date_taken >= ?")
+            params.append(self.since.isoformat())
+
+        if self.until is not None:
+            conditions.append("date_taken < ?")
+            params.append(self.until.isoformat())
+
+        for column, value in (("camera", self.camera), ("lens", self.lens)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+
+        if self.extension is not None:
+            conditions.append("extension = ?")
+            params.append(self.extension.lower())
+
+        if self.min_rating is not None:
+            conditions.append("rating >= ?")
+            params.append(self.min_rating)
+
+        if self.folder is not None:
+            conditions.append("folder = ?")
+            params.append(str(self.folder.absolute()))
+
+        if not conditions:
+            return "", params
+
+        return " WHERE " + " AND ".join(conditions), params
+
+
+ALL_SOURCES = Query()
+
+
+class SourceCatalog:
+    __COLUMNS = "path, folder, name, extension, files, signature, date_taken, camera, lens, rating, label"
+    __INDEXED = ("folder", "date_taken", "camera", "lens", "extension", "rating")
+
+    GROUP_COLUMNS: ClassVar[dict[str, str]] = {
+        "camera": "camera",
+        "lens": "lens",
+        "extension": "extension",
+        "rating": "rating",
+        "label": "label",
+        "folder": "folder",
+        "day": "substr(date_taken, 1, 10)",
+    }
+
+    def __init__(self, path: Path | str = ":memory:", workers: int | None = None) -> None:
+        super().__init__()
+
+        self.__workers = workers
+
+        self.__connection = sqlite3.connect(path)
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            "path TEXT PRIMARY KEY, folder TEXT, name TEXT, extension TEXT, files TEXT, signature TEXT, "
+            "date_taken TEXT, camera TEXT, lens TEXT, rating INTEGER, label TEXT)"
+        )
+
+        for column in SourceCatalog.__INDEXED:
+            self.__connection.execute(f"CREATE INDEX IF NOT EXISTS sources_{column} ON sources ({column})")
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count()
+
+    @staticmethod
+    def __signature(source: Source) -> str:
+        stats = [file.path.stat() for file in source.files()]
+
+        # a sidecar edit changes the rating, so every file of the source takes part
+        return json.dumps([[stat.st_size, stat.st_mtime] for stat in stats])
+
+    @staticmethod
+    def __describe(source: Source, signature: str) -> CatalogRow:
+        date_taken = None
+        camera = None
+        lens = None
+
+        # unreadable files are still catalogued, just without the fields that need exif
+        try:
+            exif = parse_exif(source.exif_path)
+
+            if exif is not None:
+                date_taken = exif.date_taken.isoformat()
+        except (OSError, AssertionError, KeyError, ValueError):
+            exif = None
+
+        if isinstance(exif, HeaderExif):
+            camera = exif.camera
+            lens = exif.lens
+
+        rating = None
+        label = None
+
+        try:
+            xmp = source.xmp
+
+            if xmp is not None:
+                rating, label = xmp.rating, xmp.label
+        except (OSError, ElementTree.ParseError, ValueError):
+            pass
+
+        return (
+            str(source.exif_path),
+            str(source.exif_path.parent),
+            source.name,
+            source.exif_path.suffix.lower(),
+            json.dumps([str(file.path) for file in source.files()]),
+            signature,
+            date_taken,
+            camera,
+            lens,
+            rating,
+            label,
+        )
+
+    def ingest(self, sources: Iterable[Source]) -> int:
+        sources = list(sources)
+        keys = [str(source.exif_path) for source in sources]
+
+        known = dict(self.__connection.execute(
+            "SELECT path, signature FROM sources WHERE path IN (SELECT value FROM json_each(?))",
+            (json.dumps(keys),)
+        ).fetchall())
+
+        changed = []
+
+        for source, key in zip(sources, keys, strict=True):
+            signature = SourceCatalog.__signature(source)
+
+            if known.get(key) != signature:
+                changed.append((source, signature))
+
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            rows = list(executor.map(lambda pair: SourceCatalog.__describe(*pair), changed))
+
+        with self.__connection:
+            self.__connection.executemany(
+                f"INSERT OR REPLACE INTO sources ({SourceCatalog.__COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+        return len(rows)
+
+    def prune(self) -> int:
+        paths = [path for (path,) in self.__connection.execute("SELECT path FROM sources")]
+        missing = [(path,) for path in paths if not Path(path).exists()]
+
+        with self.__connection:
+            self.__connection.executemany("DELETE FROM sources WHERE path = ?", missing)
+
+        return len(missing)
+
+    def select(self, query: Query = ALL_SOURCES) -> list[Source]:
+        where, params = query.where()
+
+        rows = self.__connection.execute(
+            f"SELECT files FROM sources{where} ORDER BY date_taken IS NULL, date_taken, name", params
+        )
+
+        return [source for (files,) in rows for source in parse_sources(File(Path(path)) for path in json.loads(files))]
+
+    def count(self, query: Query = ALL_SOURCES) -> int:
+        where, params = query.where()
+
+        (count,) = self.__connection.execute(f"SELECT count(*) FROM sources{where}", params).fetchone()
+
+        return count
+
+    def group_count(self, column: str, query: Query = ALL_SOURCES) -> dict[Any, int]:
+        expression = SourceCatalog.GROUP_COLUMNS[column]
+        where, params = query.where()
+
+        rows = self.__connection.execute(
+            f"SELECT {expression}, count(*) FROM sources{where} GROUP BY 1 ORDER BY 1", params
+        )
+
+        return dict(rows.fetchall())
+
+    def close(self) -> None:
+        self.__connection.close()
@@ -1,22 +1,57 @@
+import json
+import os
+import sqlite3
+import threading
 from abc import ABC, abstractmethod
-from collections.abc import Iterable
-from datetime import datetime
+from array import array
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta, timezone
 from functools import cached_property
+from operator import itemgetter
 from pathlib import Path
-from typing import ClassVar, Self
+from typing import Any, ClassVar, Generic, Self, TypeVar
 
 from exif import Image  # type: ignore[import-untyped]
 from PIL import ExifTags
 from PIL import Image as ImageModule
 from PIL.Image import Exif as PilExif
 
+from justin_utils import heif, tiff, util
+from justin_utils.filesystem import File
+
+T = TypeVar("T")
+
 
 class Exif(ABC):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def date_taken(self) -> datetime:
         pass
 
+    @property
+    def capture_time(self) -> datetime:
+        return self.date_taken
+
+    @property
+    def utc_offset(self) -> timedelta | None:
+        return None
+
+    @property
+    def camera(self) -> str | None:
+        return None
+
     def __lt__(self, other: 'Exif') -> bool:
         return self.date_taken < other.date_taken
 
@@ -33,7 +68,7 @@ class PillowExif(Exif):
     def date_taken(self) -> datetime:
         date_str = self.__get_tag_value("DateTimeOriginal") or self.__get_tag_value("DateTime")
         assert date_str is not None
-        return datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")  # noqa: DTZ007
+        return parse_exif_date(date_str)
 
     def __get_tag_value(self, tag: str) -> str | None:
         return self.source_exif.get(PillowExif.__reverse_mapping[tag])
@@ -45,22 +80,17 @@ class PillowExif(Exif):
 
     @classmethod
     def from_path(cls, path: Path) -> Self:
-        return cls(ImageModule.open(path).getexif())
+        with ImageModule.open(path) as image:
+            return cls(image.getexif())
 
 
 class NativeExif(Exif):
     @cached_property
     def date_taken(self) -> datetime:
         if hasattr(self.source_exif, "datetime_original"):
-            return datetime.strptime(  # noqa: DTZ007
-                self.source_exif.datetime_original,
-                "%Y:%m:%d %H:%M:%S"
-            )
+            return parse_exif_date(self.source_exif.datetime_original)
         elif hasattr(self.source_exif, "datetime_digitized"):
-            return datetime.strptime(  # noqa: DTZ007
-                self.source_exif.datetime_digitized,
-                "%Y:%m:%d %H:%M:%S"
-            )
+            return parse_exif_date(self.source_exif.datetime_digitized)
         else:
             assert False
 
@@ -77,39 +107,747 @@ class NativeExif(Exif):
             return cls(my_image)
 
 
-def parse_exif(path: Path) -> Exif | None:
+def parse_exif_date(value: str) -> datetime:
+    # "YYYY:MM:DD HH:MM:SS" is fixed-width, slicing it is several times faster than strptime
+    if len(value) != 19 or value[4] != ":" or value[7] != ":" or value[10] != " " or value[13] != ":" \
+            or value[16] != ":":
+        raise ValueError(f"{value!r} is not an EXIF date")
+
+    return datetime(  # noqa: DTZ001
+        int(value[0:4]),
+        int(value[5:7]),
+        int(value[8:10]),
+        int(value[11:13]),
+        int(value[14:16]),
+        int(value[17:19]),
+    )
+
+
+def parse_utc_offset(value: str) -> timedelta:
+    if len(value) != 6 or value[0] not in "+-" or value[3] != ":":
+        raise ValueError(f"{value!r} is not an EXIF offset")
+
+    offset = timedelta(hours=int(value[1:3]), minutes=int(value[4:6]))
+
+    return -offset if value[0] == "-" else offset
+
+
+@dataclass(frozen=True)
+class ExifField(Generic[T]):
+    # the first tag present wins
+    tags: tuple[int, ...]
+    convert: Callable[[Any], T]
+
+
+class HeaderExif(Exif):
+    __slots__ = ("__date_taken", "__entries", "__order")
+
+    FIELDS: ClassVar[dict[str, ExifField]] = {
+        "date_taken": ExifField((tiff.DATETIME_ORIGINAL, tiff.DATETIME_DIGITIZED, tiff.DATETIME), parse_exif_date),
+        "date_original": ExifField((tiff.DATETIME_ORIGINAL,), parse_exif_date),
+        "sub_second": ExifField((tiff.SUBSEC_TIME_ORIGINAL,), str),
+        "utc_offset": ExifField((tiff.OFFSET_TIME_ORIGINAL, tiff.OFFSET_TIME), parse_utc_offset),
+        "orientation": ExifField((tiff.ORIENTATION,), int),
+        "make": ExifField((tiff.MAKE,), str),
+        "model": ExifField((tiff.MODEL,), str),
+        "lens": ExifField((tiff.LENS_MODEL,), str),
+    }
+
+    # parsing only tests tag membership, so a new field costs nothing until it is read
+    TAGS: ClassVar[frozenset[int]] = frozenset(tag for field in FIELDS.values() for tag in field.tags)
+
+    def __init__(self, order: str, entries: dict[int, tiff.RawEntry]) -> None:
+        super().__init__()
+
+        self.__order = order
+        self.__entries = entries
+        self.__date_taken: datetime | None = None
+
+    def value(self, tag: int) -> Any:
+        entry = self.__entries.get(tag)
+
+        if entry is None:
+            return None
+
+        type_, count, raw = entry
+
+        return tiff.decode(raw, self.__order, type_, count, 0)
+
+    def field(self, name: str) -> Any:
+        field = HeaderExif.FIELDS[name]
+
+        for tag in field.tags:
+            value = self.value(tag)
+
+            if value is None or value == "":
+                continue
+
+            # cameras write placeholders such as "0000:00:00 00:00:00", the next tag may still hold a real value
+            try:
+                return field.convert(value)
+            except ValueError:
+                continue
+
+        return None
+
+    @property
+    def date_taken(self) -> datetime:
+        # sort keys read the date over and over, so it is decoded once
+        if self.__date_taken is None:
+            date_taken = self.field("date_taken")
+            assert date_taken is not None
+            self.__date_taken = date_taken
+
+        return self.__date_taken
+
+    @property
+    def capture_time(self) -> datetime:
+        date_original = self.field("date_original")
+        sub_second = (self.field("sub_second") or "").strip()
+
+        if date_original is None or not sub_second.isdigit():
+            return self.date_taken
+
+        return date_original.replace(microsecond=int(sub_second[:6].ljust(6, "0")))
+
+    @property
+    def utc_offset(self) -> timedelta | None:
+        return self.field("utc_offset")
+
+    @property
+    def orientation(self) -> int | None:
+        return self.field("orientation")
+
+    @property
+    def camera(self) -> str | None:
+        make = self.field("make")
+        model = self.field("model")
+
+        if make and model and not model.startswith(make):
+            return f"{make} {model}"
+
+        return model or make
+
+    @property
+    def lens(self) -> str | None:
+        return self.field("lens")
+
+    __RAF_MAGIC = b"FUJIFILMCCD-RAW "
+    __RAF_JPEG_OFFSET = 84
+
+    @staticmethod
+    def jpeg_tiff_offset(data: bytes | memoryview, start: int = 0) -> int | None:
+        if bytes(data[start:start + 2]) != b"\xff\xd8":
+            return None
+
+        offset = start + 2
+
+        while offset + 4 <= len(data):
+            if data[offset] != 0xFF:
+                return None
+
+            marker = data[offset + 1]
+
+            if marker in (0xD9, 0xDA):  # end of image or start of scan, exif must come before
+                return None
+
+            length = int.from_bytes(data[offset + 2:offset + 4], "big")
+
+            if marker == 0xE1 and bytes(data[offset + 4:offset + 10]) == b"Exif\x00\x00":
+                return offset + 10
+
+            offset += 2 + length
+
+        return None
+
+    @staticmethod
+    def tiff_offset(data: bytes | memoryview) -> int | None:
+        prefix = bytes(data[:16])
+
+        if prefix.startswith(b"\xff\xd8"):
+            return HeaderExif.jpeg_tiff_offset(data)
+        elif prefix == HeaderExif.__RAF_MAGIC:
+            # fujifilm raw keeps its exif in the embedded preview jpeg
+            jpeg_offset = int.from_bytes(data[HeaderExif.__RAF_JPEG_OFFSET:HeaderExif.__RAF_JPEG_OFFSET + 4], "big")
+
+            return HeaderExif.jpeg_tiff_offset(data, jpeg_offset)
+        elif prefix[4:8] == b"ftyp":
+            return heif.exif_tiff_offset(data)
+        else:
+            return 0
+
+    @staticmethod
+    def preview_range(data: bytes | memoryview, *, largest: bool = True) -> tuple[int, int] | None:
+        candidates = []
+        prefix = bytes(data[:16])
+
+        if prefix.startswith(b"\xff\xd8"):
+            # a jpeg is its own largest preview
+            candidates.append((0, len(data)))
+        elif prefix == HeaderExif.__RAF_MAGIC:
+            position = HeaderExif.__RAF_JPEG_OFFSET
+
+            candidates.append((
+                int.from_bytes(data[position:position + 4], "big"),
+                int.from_bytes(data[position + 4:position + 8], "big"),
+            ))
+
+        try:
+            offset = HeaderExif.tiff_offset(data)
+
+            if offset is not None:
+                candidates += tiff.jpeg_ranges(data, offset)
+        except (tiff.TiffError, heif.HeifError):
+            pass
+
+        candidates = [(start, length) for start, length in candidates if length > 0 and start + length <= len(data)]
+
+        if not candidates:
+            return None
+
+        if largest:
+            return max(candidates, key=itemgetter(1))
+        else:
+            return min(candidates, key=itemgetter(1))
+
+    @classmethod
+    def from_data(cls, data: bytes | memoryview) -> Self | None:
+        try:
+            offset = cls.tiff_offset(data)
+
+            if offset is None:
+                return None
+
+            order, entries = tiff.read_entries(data, HeaderExif.TAGS, offset)
+        except (tiff.TiffError, heif.HeifError):
+            return None
+
+        exif = cls(order, entries)
+
+        if exif.field("date_taken") is None:
+            return None
+
+        return exif
+
+    @classmethod
+    def from_path(cls, path: Path) -> Self:
+        with File(path).mapped(transient=True) as data:
+            exif = cls.from_data(data)
+
+        assert exif is not None
+        return exif
+
+
+class StoredExif(Exif):
+    def __init__(self, fields: dict[str, Any]) -> None:
+        super().__init__()
+
+        self.fields = fields
+
+    @cached_property
+    def date_taken(self) -> datetime:
+        date_str = self.fields.get("date_taken")
+        assert date_str is not None
+        return datetime.fromisoformat(date_str)
+
+    @cached_property
+    def capture_time(self) -> datetime:
+        capture_str = self.fields.get("capture_time")
+
+        if capture_str is None:
+            return self.date_taken
+
+        return datetime.fromisoformat(capture_str)
+
+    @property
+    def utc_offset(self) -> timedelta | None:
+        seconds = self.fields.get("utc_offset")
+
+        if seconds is None:
+            return None
+
+        return timedelta(seconds=seconds)
+
+    @property
+    def camera(self) -> str | None:
+        return self.fields.get("camera")
+
+    @classmethod
+    def from_exif(cls, exif: Exif | None) -> Self:
+        date_taken: str | None = None
+        capture_time: str | None = None
+        utc_offset: float | None = None
+        camera: str | None = None
+
+        if exif is not None:
+            try:
+                date_taken = exif.date_taken.isoformat()
+                capture_time = exif.capture_time.isoformat()
+            except (AssertionError, KeyError, ValueError):
+                date_taken = None
+                capture_time = None
+
+            if exif.utc_offset is not None:
+                utc_offset = exif.utc_offset.total_seconds()
+
+            camera = exif.camera
+
+        return cls({"date_taken": date_taken, "capture_time": capture_time, "utc_offset": utc_offset, "camera": camera})
+
+    @classmethod
+    def from_path(cls, path: Path) -> Self:
+        exif = parse_exif(path)
+        assert exif is not None
+        return cls.from_exif(exif)
+
+
+class ExifCache:
+    __COMMIT_EVERY = 500
+    __QUERY_CHUNK = 500
+
+    def __init__(self, path: Path) -> None:
+        super().__init__()
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS exif (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, fields TEXT)"
+        )
+
+        self.__prefetched: dict[str, tuple[int, float, str]] = {}
+        self.__pending = 0
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def get(self, path: Path, stat: os.stat_result | None = None) -> StoredExif | None:
+        if stat is None:
+            stat = path.stat()
+
+        key = str(path.absolute())
+
+        with self.__lock:
+            row = self.__prefetched.get(key)
+
+            if row is None:
+                row = self.__connection.execute(
+                    "SELECT size, mtime, fields FROM exif WHERE path = ?", (key,)
+                ).fetchone()
+
+        if row is None:
+            return None
+
+        size, mtime, fields = row
+
+        if (size, mtime) != (stat.st_size, stat.st_mtime):
+            return None
+
+        return StoredExif(json.loads(fields))
+
+    def put(self, path: Path, exif: Exif | None, stat: os.stat_result | None = None) -> StoredExif:
+        if stat is None:
+            stat = path.stat()
+
+        stored = StoredExif.from_exif(exif)
+        row = (str(path.absolute()), stat.st_size, stat.st_mtime, json.dumps(stored.fields))
+
+        with self.__lock:
+            self.__connection.execute("INSERT OR REPLACE INTO exif VALUES (?, ?, ?, ?)", row)
+            self.__prefetched[row[0]] = row[1:]
+
+            self.__pending += 1
+
+            if self.__pending >= ExifCache.__COMMIT_EVERY:
+                self.__commit()
+
+        return stored
+
+    def prefetch(self, paths: Iterable[Path]) -> None:
+        keys = [str(path.absolute()) for path in paths]
+
+        with self.__lock:
+            for start in range(0, len(keys), ExifCache.__QUERY_CHUNK):
+                chunk = keys[start:start + ExifCache.__QUERY_CHUNK]
+                placeholders = ", ".join("?" for _ in chunk)
+
+                rows = self.__connection.execute(
+                    f"SELECT path, size, mtime, fields FROM exif WHERE path IN ({placeholders})", chunk
+                )
+
+                for path, size, mtime, fields in rows:
+                    self.__prefetched[path] = (size, mtime, fields)
+
+    def compact(self) -> int:
+        with self.__lock:
+            rows = self.__connection.execute("SELECT path, size, mtime FROM exif").fetchall()
+            stale = []
+
+            for path, size, mtime in rows:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    stale.append((path,))
+
+                    continue
+
+                if (size, mtime) != (stat.st_size, stat.st_mtime):
+                    stale.append((path,))
+
+            self.__connection.executemany("DELETE FROM exif WHERE path = ?", stale)
+            self.__commit()
+            self.__connection.execute("VACUUM")
+
+            for (path,) in stale:
+                self.__prefetched.pop(path, None)
+
+        return len(stale)
+
+    def __commit(self) -> None:
+        self.__connection.commit()
+
+        self.__pending = 0
+
+    def flush(self) -> None:
+        with self.__lock:
+            self.__commit()
+
+    def close(self) -> None:
+        self.flush()
+
+        self.__connection.close()
+
+
+__HEADER_TYPES = [
+    ".jpg",
+    ".tif",
+    ".nef",
+    ".dng",
+    ".arw",
+    ".raf",
+    ".heic",
+]
+
+
+def __fallback_class(suffix: str) -> type[PillowExif | NativeExif] | None:
+    if suffix in [".nef", ".dng", ".tif", ".arw", ]:
+        return PillowExif
+    elif suffix in [".jpg", ]:
+        return NativeExif
+    else:
+        return None
+
+
+def __is_supported(path: Path) -> bool:
+    return path.suffix.lower() in __HEADER_TYPES
+
+
+def __read_exif(path: Path) -> Exif | None:
+    with File(path).mapped(transient=True) as data:
+        exif = HeaderExif.from_data(data)
+
+    if exif is not None:
+        return exif
+
+    exif_class = __fallback_class(path.suffix.lower())
+
+    if exif_class is None:
+        return None
+
+    fallback = exif_class.from_path(path)
+
+    # fallback backends parse lazily, so a missing or malformed date is found here and read as undated, the way
+    # the cache stores it
+    try:
+        _ = fallback.date_taken
+    except (AssertionError, KeyError, ValueError):
+        return None
+
+    return fallback
+
+
+def parse_exif(path: Path, cache: ExifCache | None = None) -> Exif | None:
     if path is None:
         return None
 
+    if not __is_supported(path):
+        return None
+
     if path.is_dir():
         return None
 
-    suffix = path.suffix.lower()
+    if cache is None:
+        return __read_exif(path)
 
-    exif_class: type[PillowExif | NativeExif]
+    stat = path.stat()
+    stored = cache.get(path, stat)
 
-    if suffix in [".nef", ".dng", ]:
-        exif_class = PillowExif
-    elif suffix in [".jpg", ]:
-        exif_class = NativeExif
+    if stored is None:
+        stored = cache.put(path, __read_exif(path), stat)
+
+    if stored.fields.get("date_taken") is None:
+        return None
+
+    return stored
+
+
+@dataclass(frozen=True)
+class ExifResult:
+    path: Path
+    exif: Exif | None = None
+    error: Exception | None = None
+
+
+def __parse_isolated(path: Path, cache: ExifCache | None, portable: bool) -> ExifResult:
+    try:
+        exif = parse_exif(path, cache)
+
+        # backend objects of the exif library can't be pickled to cross a process boundary
+        if portable and isinstance(exif, PillowExif | NativeExif):
+            exif = StoredExif.from_exif(exif)
+
+        return ExifResult(path, exif)
+    except Exception as e:  # noqa: BLE001
+        return ExifResult(path, error=e)
+
+
+__PREFETCH_CHUNK = 500
+
+
+def __read_isolated(path: Path) -> ExifResult:
+    try:
+        # what parse_exif would cache, converted in the worker since backend objects can't be pickled
+        return ExifResult(path, StoredExif.from_exif(__read_exif(path)))
+    except Exception as e:  # noqa: BLE001
+        return ExifResult(path, error=e)
+
+
+def parse_exif_batch(
+        paths: Iterable[Path],
+        workers: int | None = None,
+        *,
+        cache: ExifCache | None = None,
+        use_processes: bool = False,
+        ordered: bool = True
+) -> Iterator[ExifResult]:
+    executor: Executor
+
+    if use_processes:
+        executor = ProcessPoolExecutor(max_workers=workers)
     else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+    # only a window of tasks is in flight, so neither the queue nor the finished results grow with the input
+    window = 4 * (workers or os.cpu_count() or 1)
+
+    misses: set[Future[ExifResult]] = set()
+
+    def submit(path: Path) -> Future[ExifResult]:
+        if not use_processes:
+            return executor.submit(__parse_isolated, path, cache, False)
+
+        # the cache can't cross process boundaries, so hits are resolved here and misses stored on return
+        if cache is None or not __is_supported(path):
+            return executor.submit(__parse_isolated, path, None, True)
+
+        stored = cache.get(path)
+
+        if stored is None:
+            future = executor.submit(__read_isolated, path)
+
+            misses.add(future)
+        else:
+            future = Future()
+            future.set_result(ExifResult(path, stored if stored.fields.get("date_taken") else None))
+
+        return future
+
+    def finish(future: Future[ExifResult]) -> ExifResult:
+        result = future.result()
+
+        # undated files are cached too, as parse_exif does in thread mode, so they aren't read again next run
+        if future in misses:
+            misses.discard(future)
+
+            if cache is not None and result.error is None:
+                stored = cache.put(result.path, result.exif)
+                result = ExifResult(result.path, stored if stored.fields.get("date_taken") else None)
+
+        return result
+
+    def drain(pending: deque[Future[ExifResult]], limit: int) -> Iterator[ExifResult]:
+        while len(pending) > limit:
+            if ordered:
+                yield finish(pending.popleft())
+
+                continue
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.remove(future)
+
+                yield finish(future)
+
+    with executor:
+        pending: deque[Future[ExifResult]] = deque()
+
+        for chunk in util.stride(paths, __PREFETCH_CHUNK):
+            if cache is not None:
+                cache.prefetch(chunk)
+
+            for path in chunk:
+                pending.append(submit(path))
+
+                yield from drain(pending, window - 1)
+
+        yield from drain(pending, 0)
+
+
+def read_preview(path: Path, *, largest: bool = True) -> memoryview | None:
+    if not __is_supported(path):
+        return None
+
+    file = File(path)
+
+    with file.mapped() as data:
+        preview_range = HeaderExif.preview_range(data, largest=largest)
+
+    if preview_range is None:
+        return None
+
+    start, length = preview_range
+
+    return file.view(start, start + length)
+
+
+def read_previews(
+        paths: Iterable[Path],
+        workers: int | None = None,
+        *,
+        largest: bool = True
+) -> Iterator[tuple[Path, memoryview | None]]:
+    # every live view pins its mapping, so only a window of results is kept ahead of the consumer
+    window = 4 * (workers or os.cpu_count() or 1)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: deque[tuple[Path, Future[memoryview | None]]] = deque()
+
+        for path in paths:
+            pending.append((path, executor.submit(read_preview, path, largest=largest)))
+
+            if len(pending) >= window:
+                done_path, future = pending.popleft()
+
+                yield done_path, future.result()
+
+        while pending:
+            done_path, future = pending.popleft()
+
+            yield done_path, future.result()
+
+
+UNDATED = -(2 ** 63)
+
+__EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+__MICROSECOND = timedelta(microseconds=1)
+
+
+def capture_timestamp(
+        exif: Exif | None,
+        *,
+        default_offset: timedelta | None = None,
+        clock_offsets: Mapping[str, timedelta] | None = None
+) -> int | None:
+    if exif is None:
+        return None
+
+    try:
+        capture_time = exif.capture_time
+    except (AssertionError, KeyError, ValueError):
         return None
 
-    return exif_class.from_path(path)
+    # the camera's own offset wins, the default is where the shoot happened, naive times are taken as utc otherwise
+    utc_offset = exif.utc_offset
+
+    if utc_offset is None:
+        utc_offset = default_offset or timedelta()
+
+    if clock_offsets:
+        capture_time += clock_offsets.get(exif.camera or "", timedelta())
+
+    return (capture_time.replace(tzinfo=timezone(utc_offset)) - __EPOCH) // __MICROSECOND
+
+
+def capture_timestamps(
+        exifs: Iterable[Exif | None],
+        *,
+        default_offset: timedelta | None = None,
+        clock_offsets: Mapping[str, timedelta] | None = None
+) -> array:
+    timestamps = array("q")
+
+    for exif in exifs:
+        timestamp = capture_timestamp(exif, default_offset=default_offset, clock_offsets=clock_offsets)
+
+        timestamps.append(UNDATED if timestamp is None else timestamp)
+
+    return timestamps
+
+
+SortKey = tuple[bool, datetime, str]
+
+
+def exif_sort_key(path: Path, exif: Exif | None) -> SortKey:
+    date_taken = None
+
+    if exif is not None:
+        try:
+            date_taken = exif.date_taken
+        except (AssertionError, KeyError, ValueError):
+            pass
+
+    # undated files go after dated ones, so dates and names are never compared with each other
+    if date_taken is None:
+        return True, datetime.min, path.name  # noqa: DTZ901
+
+    return False, date_taken, path.name
+
+
+def __sort_keys(
+        seq: Iterable[Path],
+        cache: ExifCache | None,
+        workers: int | None,
+        on_error: Callable[[Path, Exception], None] | None
+) -> Iterator[tuple[SortKey, Path]]:
+    failed = 0
+
+    # results are dropped as soon as their key is built, so only the batch window and the keys are held
+    for result in parse_exif_batch(seq, workers, cache=cache):
+        if result.error is not None:
+            failed += 1
+
+            if on_error is not None:
+                on_error(result.path, result.error)
 
+        yield exif_sort_key(result.path, result.exif), result.path
 
-def exif_sorted(seq: Iterable[Path]) -> Iterable[Path]:
-    class Comparator:
-        def __init__(self, path: Path) -> None:
-            super().__init__()
+    if failed > 0 and on_error is None:
+        print(f"Failed to read exif of {failed} files, they are sorted as undated")
 
-            self.exif = parse_exif(path)
-            self.name = path.name
 
-        def __lt__(self, other: 'Comparator') -> bool:
-            if other.exif and self.exif:
-                return self.exif.date_taken < other.exif.date_taken
+def exif_sorted(
+        seq: Iterable[Path],
+        cache: ExifCache | None = None,
+        workers: int | None = None,
+        chunk_size: int | None = None,
+        on_error: Callable[[Path, Exception], None] | None = None
+) -> Iterable[Path]:
+    keyed = __sort_keys(seq, cache, workers, on_error)
 
-            return self.name < other.name
+    if chunk_size is None:
+        return [path for _, path in sorted(keyed, key=itemgetter(0))]
 
-    return sorted(seq, key=Comparator)
+    return (path for _, path in util.external_sorted(keyed, key=itemgetter(0), chunk_size=chunk_size))
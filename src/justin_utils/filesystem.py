@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import ctypes
+import errno
+import mmap
+import os
 import platform
 import shutil
 import sys
+import threading
 import webbrowser
 from abc import ABC, abstractmethod
-from collections.abc import Callable, Iterable
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
 from functools import partial
-from pathlib import Path
-from typing import ClassVar, Self
+from pathlib import Path, PurePath
+from typing import Self
 
 if sys.version_info >= (3, 13):
     from warnings import deprecated
@@ -16,6 +27,8 @@ else:
     from typing_extensions import deprecated
 
 from justin_utils.data import DataSize
+from justin_utils.scan_rules import ScanRules
+from justin_utils.singleton import Singleton
 from justin_utils.time_formatter import format_time
 from justin_utils.transfer import TransferSpeedMeter, TransferTimeEstimator
 
@@ -93,15 +106,133 @@ def __get_mount(path: Path) -> Path:
         assert False
 
 
+def __sync_filesystem(path: Path, written: Iterable[Path]) -> None:
+    system_name = platform.system()
+
+    if system_name == "Linux":
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = os.open(path, os.O_RDONLY)
+
+        try:
+            if libc.syncfs(fd) != 0:
+                errno = ctypes.get_errno()
+
+                raise OSError(errno, os.strerror(errno), str(path))
+        finally:
+            os.close(fd)
+    elif system_name == "Darwin":
+        os.sync()
+    else:
+        for file_path in written:
+            with file_path.open("rb+") as file:
+                os.fsync(file.fileno())
+
+
 # endregion
 
-# region generic operations
+# region durability
 
-def __handle_tree(src_path: Path, dst_path: Path, file_handler: Callable[[Path, Path], None], action_name: str) -> None:
-    assert src_path.is_dir()
+class Durability(Enum):
+    NONE = "no"
+    PER_FILE = "per-file"
+    BATCHED = "batched"
 
-    dst_path = dst_path.resolve()
 
+@dataclass(frozen=True)
+class DurabilityPolicy:
+    mode: Durability = Durability.NONE
+
+    # batched mode syncs every batch_size files, or once per destination directory when it is None
+    batch_size: int | None = None
+
+
+DEFAULT_DURABILITY = DurabilityPolicy()
+__DEFERRED_DURABILITY = DurabilityPolicy(Durability.BATCHED, batch_size=sys.maxsize)
+
+
+@dataclass
+class SyncStats:
+    mode: Durability
+    count: int = 0
+    time: timedelta = field(default_factory=timedelta)
+
+    def __str__(self) -> str:
+        return f"{self.mode.value} sync: {self.count} calls, {format_time(self.time)}"
+
+
+def __fsync_path(path: Path) -> None:
+    if platform.system() == "Windows":
+        flags = os.O_RDWR
+    else:
+        flags = os.O_RDONLY
+
+    fd = os.open(path, flags)
+
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def __sync_in_batches(
+        pairs: Iterable[tuple[Path, Path]],
+        policy: DurabilityPolicy,
+        on_synced: Callable[[list[tuple[Path, Path]]], None] | None = None
+) -> SyncStats:
+    stats = SyncStats(policy.mode)
+    batch: list[tuple[Path, Path]] = []
+
+    def flush() -> None:
+        if not batch:
+            return
+
+        start = datetime.now()  # noqa: DTZ005
+
+        if policy.mode == Durability.PER_FILE:
+            for _, new_path in batch:
+                __fsync_path(new_path)
+
+                if platform.system() != "Windows":
+                    __fsync_path(new_path.parent)
+
+            stats.count += len(batch)
+        elif policy.mode == Durability.BATCHED:
+            __sync_filesystem(batch[0][1].parent, [new_path for _, new_path in batch])
+
+            stats.count += 1
+
+        stats.time += datetime.now() - start  # noqa: DTZ005
+
+        if on_synced is not None:
+            on_synced(batch.copy())
+
+        batch.clear()
+
+    for file_path, new_path in pairs:
+        if policy.mode == Durability.BATCHED and policy.batch_size is None \
+                and batch and batch[-1][1].parent != new_path.parent:
+            flush()
+
+        batch.append((file_path, new_path))
+
+        if policy.mode != Durability.BATCHED or len(batch) == policy.batch_size:
+            flush()
+
+    flush()
+
+    return stats
+
+
+# endregion
+
+# region generic operations
+
+def __transfer_tree(
+        src_path: Path,
+        dst_path: Path,
+        file_handler: Callable[[Path, Path], None],
+        action_name: str
+) -> Iterator[tuple[Path, Path]]:
     files = __flatten(src_path)
     files.sort()
 
@@ -117,14 +248,14 @@ def __handle_tree(src_path: Path, dst_path: Path, file_handler: Callable[[Path,
     for index, file in enumerate(files):
         assert file.is_file()
 
-        relative_path = file.relative_to(src_path.parent)
+        relative_path = file.relative_to(src_path)
         file_size = file.stat().st_size
 
         speed_meter.feed(file_size)
 
         current_speed = speed_meter.current_value
 
-        log_string = f"{action_name} {relative_path} ({index}/{len(files)})" \
+        log_string = f"{action_name} {src_path.name / relative_path} ({index}/{len(files)})" \
                      f" ({total_copied} / {total_size}) {current_speed}."
 
         estimated_time = TransferTimeEstimator.estimate(current_speed, total_size - total_copied)
@@ -134,16 +265,37 @@ def __handle_tree(src_path: Path, dst_path: Path, file_handler: Callable[[Path,
 
         print(log_string, flush=True)
 
-        file_handler(file, dst_path / relative_path)
+        new_path = dst_path / relative_path
+
+        file_handler(file, new_path)
 
         total_copied.add_bytes(file_size)
 
-    if __tree_is_empty(src_path):
-        __remove_tree(src_path)
+        yield file, new_path
 
     print(f"Processed {len(files)}/{len(files)} files, {total_copied} / {total_size}, {speed_meter.average_value}")
 
-    print("Finished")
+
+def __handle_tree(
+        src_path: Path,
+        dst_path: Path,
+        file_handler: Callable[[Path, Path], None],
+        action_name: str,
+        on_synced: Callable[[list[tuple[Path, Path]]], None] | None = None,
+        durability: DurabilityPolicy = DEFAULT_DURABILITY
+) -> None:
+    assert src_path.is_dir()
+
+    dst_path = dst_path.resolve()
+
+    pairs = __transfer_tree(src_path, dst_path, file_handler, action_name)
+
+    stats = __sync_in_batches(pairs, durability, on_synced)
+
+    if __tree_is_empty(src_path):
+        __remove_tree(src_path)
+
+    print(f"Finished, {stats}")
 
 
 # endregion
@@ -153,25 +305,65 @@ def __handle_tree(src_path: Path, dst_path: Path, file_handler: Callable[[Path,
 def __move_file(file_path: Path, new_path: Path) -> None:
     assert __get_mount(file_path) != __get_mount(new_path)
 
-    try:
-        __copy_file(file_path, new_path)
-    except:
-        __remove_file(new_path)
+    __copy_file(file_path, new_path)
+
+
+# errors of filesystems without hard links, such as FAT and exFAT on memory cards
+__NO_LINK_ERRNOS = (errno.EPERM, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EMLINK, errno.EINVAL)
 
+
+def __link_file(file_path: Path, new_path: Path) -> None:
+    # unlike rename, which silently replaces an existing file on POSIX, linking fails atomically if the name is taken
+    try:
+        os.link(file_path, new_path)
+    except FileExistsError:
         raise
+    except OSError as e:
+        if e.errno not in __NO_LINK_ERRNOS:
+            raise
+
+        if new_path.exists():
+            raise FileExistsError(new_path) from e
+
+        file_path.rename(new_path)
+
+        return
 
     try:
-        __remove_file(file_path)
+        file_path.unlink()
     except:
-        __remove_file(file_path)
+        new_path.unlink()
 
         raise
 
 
-__move_tree = partial(__handle_tree, file_handler=__move_file, action_name="Moving")
+class TransferVerificationError(OSError):
+    pass
+
+
+def __remove_moved(moved: list[tuple[Path, Path]]) -> None:
+    # the source may be the only complete copy, so this check must survive python -O
+    for file_path, new_path in moved:
+        new_size = new_path.stat().st_size
+        size = file_path.stat().st_size
 
+        if new_size != size:
+            raise TransferVerificationError(f"{new_path} has {new_size} bytes, expected {size} as in {file_path}")
 
-def move(src_path: Path, dst_path: Path) -> None:
+    for file_path, _ in moved:
+        __remove_file(file_path)
+
+
+__move_tree = partial(__handle_tree, file_handler=__move_file, action_name="Moving", on_synced=__remove_moved)
+
+
+def move(
+        src_path: Path,
+        dst_path: Path,
+        *,
+        deferred_removal: bool = False,
+        durability: DurabilityPolicy = DEFAULT_DURABILITY
+) -> None:
     __check_paths(src_path, dst_path)
 
     new_file_path = dst_path / src_path.name
@@ -179,14 +371,18 @@ def move(src_path: Path, dst_path: Path) -> None:
     if src_path == new_file_path:
         return
 
+    if deferred_removal:
+        durability = __DEFERRED_DURABILITY
+
     if __get_mount(src_path) == __get_mount(dst_path):
         new_file_path.parent.mkdir(parents=True, exist_ok=True)
 
         src_path.rename(new_file_path)
     elif src_path.is_dir():
-        __move_tree(src_path, new_file_path)
+        __move_tree(src_path, new_file_path, durability=durability)
     elif src_path.is_file():
         __move_file(src_path, new_file_path)
+        __sync_in_batches([(src_path, new_file_path)], durability, __remove_moved)
     else:
         assert False
 
@@ -198,33 +394,222 @@ def move(src_path: Path, dst_path: Path) -> None:
 def __copy_file(file_path: Path, new_path: Path) -> None:
     new_path = new_path.resolve()
 
-    assert not new_path.exists()
-
     new_path.parent.mkdir(parents=True, exist_ok=True)
 
     assert new_path.parent.exists()
     assert new_path.parent.is_dir()
 
-    # noinspection PyTypeChecker
-    shutil.copy2(file_path, new_path)
+    # the name is claimed exclusively first, so a clash raises FileExistsError instead of overwriting another file
+    new_path.open("xb").close()
+
+    try:
+        # noinspection PyTypeChecker
+        shutil.copy2(file_path, new_path)
+    except:
+        new_path.unlink()
+
+        raise
 
 
 __copy_tree = partial(__handle_tree, file_handler=__copy_file, action_name="Copying")
 
 
-def copy(src_path: Path, dst_path: Path) -> None:
+def copy(src_path: Path, dst_path: Path, *, durability: DurabilityPolicy = DEFAULT_DURABILITY) -> None:
     __check_paths(src_path, dst_path)
 
     new_item_path = dst_path / src_path.name
 
     if src_path.is_file():
         __copy_file(src_path, new_item_path)
+        __sync_in_batches([(src_path, new_item_path)], durability)
     elif src_path.is_dir():
-        __copy_tree(src_path, new_item_path)
+        __copy_tree(src_path, new_item_path, durability=durability)
     else:
         assert False
 
 
+# endregion
+
+# region bulk operations
+
+TransferGroup = Sequence[tuple[Path, Path]]
+
+
+def __transfer_group(group: list[tuple[Path, Path, bool]]) -> list[tuple[Path, Path]]:
+    done: list[tuple[Path, Path, bool]] = []
+
+    try:
+        for file_path, new_path, rename in group:
+            if rename:
+                __link_file(file_path, new_path)
+            else:
+                __copy_file(file_path, new_path)
+
+            done.append((file_path, new_path, rename))
+    except:
+        # a group is a raw and its sidecars, so it lands either whole or not at all
+        for file_path, new_path, rename in reversed(done):
+            if rename:
+                __link_file(new_path, file_path)
+            else:
+                __remove_file(new_path)
+
+        raise
+
+    return [(file_path, new_path) for file_path, new_path, rename in done if not rename]
+
+
+def __handle_groups(
+        groups: Iterable[TransferGroup],
+        *,
+        remove_sources: bool,
+        action_name: str,
+        workers: int | None = None,
+        durability: DurabilityPolicy = DEFAULT_DURABILITY
+) -> list[OSError | None]:
+    mounts: dict[Path, Path] = {}
+
+    def mount(path: Path) -> Path:
+        if path not in mounts:
+            mounts[path] = __get_mount(path)
+
+        return mounts[path]
+
+    # mounts and folders are resolved once per directory, not once per file
+    planned = []
+    names = []
+
+    for group in groups:
+        names.append(group[0][0].name if group else "")
+        planned.append([
+            (file_path, new_path, remove_sources and mount(file_path.parent) == mount(new_path.parent))
+            for file_path, new_path in group
+            if file_path != new_path
+        ])
+
+    errors: list[OSError | None] = [None] * len(planned)
+    claimed: set[Path] = set()
+
+    # groups run in parallel, so a destination shared by two of them (say DSC_0001.NEF from two cards) is rejected
+    # before anything is submitted, in favour of the earlier group
+    for index, planned_group in enumerate(planned):
+        new_paths = [new_path.absolute() for _, new_path, _ in planned_group]
+        clashes = [new_path for i, new_path in enumerate(new_paths) if new_path in claimed or new_path in new_paths[:i]]
+
+        if clashes:
+            errors[index] = FileExistsError(f"{clashes[0]} is a destination of another file in this transfer")
+        else:
+            claimed.update(new_paths)
+
+    for new_folder in {new_path.parent for group in planned for _, new_path, _ in group}:
+        new_folder.mkdir(parents=True, exist_ok=True)
+
+    sizes = [sum(file_path.stat().st_size for file_path, _, _ in group) for group in planned]
+
+    total_size = DataSize.from_bytes(sum(sizes))
+    total_copied = DataSize.from_bytes(0)
+
+    speed_meter = TransferSpeedMeter()
+
+    owners: dict[Path, int] = {}
+    pending: dict[int, list[tuple[Path, Path]]] = {}
+    expected: dict[int, int] = {}
+
+    def fail(index: int, error: OSError) -> None:
+        errors[index] = error
+
+        print(f"Failed {action_name.lower()} {names[index]}: {error}", flush=True)
+
+    def remove_synced(moved: list[tuple[Path, Path]]) -> None:
+        completed = []
+
+        # a group may span sync batches, its sources are only removed once every member is synced and verified
+        for file_path, new_path in moved:
+            index = owners[new_path]
+            pending[index].append((file_path, new_path))
+
+            if len(pending[index]) == expected[index]:
+                completed.append(index)
+
+        # a group that fails verification or removal keeps its remaining sources, the rest of the batch goes on
+        for index in completed:
+            group_moved = pending.pop(index)
+
+            if errors[index] is not None:
+                continue
+
+            try:
+                __remove_moved(group_moved)
+            except OSError as error:
+                fail(index, error)
+
+    print(f"{action_name} {sum(len(group) for group in planned)} files in {len(planned)} groups...")
+
+    def transferred() -> Iterator[tuple[Path, Path]]:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(__transfer_group, group): index
+                for index, group in enumerate(planned)
+                if errors[index] is None
+            }
+
+            for index, error in enumerate(errors):
+                if error is not None:
+                    fail(index, error)
+
+            for done_count, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+
+                try:
+                    written = future.result()
+                except OSError as error:
+                    fail(index, error)
+
+                    continue
+
+                speed_meter.feed(sizes[index])
+                total_copied.add_bytes(sizes[index])
+
+                current_speed = speed_meter.current_value
+
+                log_string = f"{action_name} {names[index]} ({done_count}/{len(futures)})" \
+                             f" ({total_copied} / {total_size}) {current_speed}."
+
+                estimated_time = TransferTimeEstimator.estimate(current_speed, total_size - total_copied)
+
+                if estimated_time is not None:
+                    log_string += f" {format_time(estimated_time)} remaining."
+
+                print(log_string, flush=True)
+
+                for _, new_path in written:
+                    owners[new_path] = index
+
+                pending[index] = []
+                expected[index] = len(written)
+
+                yield from written
+
+    speed_meter.start()
+
+    on_synced = remove_synced if remove_sources else None
+    stats = __sync_in_batches(transferred(), durability, on_synced)
+
+    transferred_count = errors.count(None)
+
+    if transferred_count > 0:
+        print(f"Processed {transferred_count}/{len(planned)} groups, {total_copied} / {total_size},"
+              f" {speed_meter.average_value}, {stats}")
+    else:
+        print(f"Processed 0/{len(planned)} groups")
+
+    return errors
+
+
+move_files = partial(__handle_groups, remove_sources=True, action_name="Moving")
+copy_files = partial(__handle_groups, remove_sources=False, action_name="Copying")
+
+
 # endregion
 
 # region remove operations
@@ -278,14 +663,20 @@ class PathBased(Movable):
     def path(self, value: Path) -> None:
         self.__path = value
 
-    def move(self, path: Path) -> None:
+    def move(
+            self,
+            path: Path,
+            *,
+            deferred_removal: bool = False,
+            durability: DurabilityPolicy = DEFAULT_DURABILITY
+    ) -> None:
         # files and folders are copied differently. Also having same drive matters
-        move(self.path, path)
+        move(self.path, path, deferred_removal=deferred_removal, durability=durability)
 
         self.__path = path / self.path.name
 
-    def copy(self, path: Path) -> None:
-        copy(self.path, path)
+    def copy(self, path: Path, *, durability: DurabilityPolicy = DEFAULT_DURABILITY) -> None:
+        copy(self.path, path, durability=durability)
 
     def move_down(self, subfolder: str) -> None:
         self.move(self.path.parent / subfolder)
@@ -301,6 +692,92 @@ class PathBased(Movable):
         self.__path = new_path
 
 
+class FileMappings(Singleton):
+    CAPACITY = 16
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.__lock = threading.Lock()
+        self.__mappings: OrderedDict[Path, tuple[int, float, mmap.mmap]] = OrderedDict()
+
+    @staticmethod
+    def open(path: Path, stat: os.stat_result | None = None) -> mmap.mmap | None:
+        if stat is None:
+            stat = path.stat()
+
+        # empty files can't be mapped
+        if stat.st_size == 0:
+            return None
+
+        with path.open("rb") as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __get(self, path: Path, stat: os.stat_result) -> mmap.mmap | None:
+        cached = self.__mappings.get(path)
+
+        if cached is not None:
+            size, mtime, mapping = cached
+
+            if (size, mtime) == (stat.st_size, stat.st_mtime):
+                self.__mappings.move_to_end(path)
+
+                return mapping
+
+            self.__release(path)
+
+        opened = FileMappings.open(path, stat)
+
+        if opened is None:
+            return None
+
+        self.__mappings[path] = (stat.st_size, stat.st_mtime, opened)
+
+        while len(self.__mappings) > FileMappings.CAPACITY:
+            self.__release(next(iter(self.__mappings)))
+
+        return opened
+
+    def get(self, path: Path) -> mmap.mmap | None:
+        stat = path.stat()
+
+        with self.__lock:
+            return self.__get(path, stat)
+
+    def view(self, path: Path, start: int = 0, end: int | None = None) -> memoryview:
+        stat = path.stat()
+
+        # the view is exported under the lock, otherwise another thread could evict and close the map before it exists
+        with self.__lock:
+            mapping = self.__get(path, stat)
+
+            if mapping is None:
+                return memoryview(b"")
+
+            return memoryview(mapping)[start:end]
+
+    def __release(self, path: Path) -> None:
+        _, _, mapping = self.__mappings.pop(path)
+
+        try:
+            mapping.close()
+        except BufferError:
+            pass  # views are still exported, the map is closed once they are released
+
+    def release(self, path: Path) -> None:
+        with self.__lock:
+            if path in self.__mappings:
+                self.__release(path)
+
+    def clear(self) -> None:
+        with self.__lock:
+            for path in list(self.__mappings):
+                self.__release(path)
+
+    def __len__(self) -> int:
+        return len(self.__mappings)
+
+
 class File(PathBased):
 
     @property
@@ -333,6 +810,28 @@ class File(PathBased):
     def extension(self) -> str:
         return self.path.suffix
 
+    def view(self, start: int = 0, end: int | None = None) -> memoryview:
+        return FileMappings.instance().view(self.path, start, end)
+
+    @contextmanager
+    def mapped(self, start: int = 0, end: int | None = None, *, transient: bool = False) -> Iterator[memoryview]:
+        # a transient map bypasses the shared cache and is closed on exit, so the file can be renamed or removed
+        # right after, even on Windows
+        if transient:
+            mapping = FileMappings.open(self.path)
+            view = memoryview(mapping if mapping is not None else b"")[start:end]
+        else:
+            mapping = None
+            view = self.view(start, end)
+
+        try:
+            yield view
+        finally:
+            view.release()
+
+            if mapping is not None:
+                mapping.close()
+
     def __str__(self) -> str:
         return f"File({self.path})"
 
@@ -352,19 +851,39 @@ class File(PathBased):
         return self.name < other.name
 
 
-class Folder(PathBased):
-    __FILES_TO_UNLINK: ClassVar[list[str]] = [name.lower() for name in [
-        ".DS_store",
-        "NC_FLLST.DAT",
-    ]]
+def scan_folder(path: Path, rules: ScanRules, prefix: PurePath) -> Iterator[tuple[os.DirEntry[str], PurePath]]:
+    # junk files are removed on sight, excluded entries are skipped, the rest come in name order
+    with os.scandir(path) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            relative_path = prefix / entry.name
 
+            if rules.is_junk(entry):
+                Path(entry.path).unlink()
+
+                continue
+
+            if not rules.is_excluded(relative_path, entry):
+                yield entry, relative_path
+
+
+class Folder(PathBased):
     # noinspection PyTypeChecker
-    def __init__(self, path: Path) -> None:
+    def __init__(self, path: Path, rules: ScanRules | None = None) -> None:
         super().__init__(path)
 
+        if rules is None:
+            rules = ScanRules.default()
+
+        self.__rules = rules
+        self.__scan_prefix = PurePath()
+
         self.__subfolder_mapping: dict[str, Self] | None = None
         self.__files: list[File] | None = None
 
+    @property
+    def rules(self) -> ScanRules:
+        return self.__rules
+
     @property
     def __subfolders(self) -> dict[str, Self]:
         if self.__subfolder_mapping is None:
@@ -479,11 +998,14 @@ class Folder(PathBased):
         self.__subfolder_mapping = {}
         self.__files = []
 
-        for child in self.path.iterdir():
-            if child.is_dir():
-                child_tree = self.from_path(child)
+        for entry, relative_path in scan_folder(self.path, self.rules, self.__scan_prefix):
+            child = Path(entry.path)
 
-                if not child_tree.empty():
+            if entry.is_dir():
+                child_tree = self.__child(child, relative_path)
+
+                # rules may hide everything in a folder, only folders that are empty on disk are removed
+                if not child_tree.empty() or not Folder.__empty_on_disk(child):
                     self.__subfolders[child.name] = child_tree
                 else:
                     try:
@@ -493,13 +1015,8 @@ class Folder(PathBased):
 
                         self.__subfolders[child.name] = child_tree
 
-            elif child.is_file():
-                if child.name.lower() in Folder.__FILES_TO_UNLINK:
-                    child.unlink()
-                elif child.stem.lower() == "_meta":
-                    continue  # metafile not included in files
-                else:
-                    self.files.append(File(child))
+            elif entry.is_file():
+                self.files.append(File(child))
 
             else:
                 print("Path is neither file nor dir")
@@ -508,11 +1025,30 @@ class Folder(PathBased):
 
         self.__files.sort(key=lambda x: x.name)
 
-    def move(self, path: Path) -> None:
+    @staticmethod
+    def __empty_on_disk(path: Path) -> bool:
+        with os.scandir(path) as entries:
+            return next(entries, None) is None
+
+    def __child(self, path: Path, scan_prefix: PurePath) -> Self:
+        child = self.from_path(path)
+
+        child.__rules = self.__rules
+        child.__scan_prefix = scan_prefix
+
+        return child
+
+    def move(
+            self,
+            path: Path,
+            *,
+            deferred_removal: bool = False,
+            durability: DurabilityPolicy = DEFAULT_DURABILITY
+    ) -> None:
         if isinstance(path, Folder):
             path = path.path
 
-        super().move(path)
+        super().move(path, deferred_removal=deferred_removal, durability=durability)
 
         self.refresh()
 
@@ -554,7 +1090,10 @@ class Folder(PathBased):
         return isinstance(other, type(self)) and other.__key == self.__key
 
     def __type_copy(self, path: Path) -> Self:
-        return type(self).from_path(path)
+        if path.is_relative_to(self.path):
+            return self.__child(path, self.__scan_prefix / path.relative_to(self.path))
+
+        return self.__child(path, PurePath())
 
     def __truediv__(self, other: str | Path) -> Self:
         return self.__type_copy(self.path / other)
@@ -594,8 +1133,14 @@ class FolderBased(PathBased):
     def path(self, value: Path) -> None:
         self.folder.path = value
 
-    def move(self, path: Path) -> None:
-        self.folder.move(path)
+    def move(
+            self,
+            path: Path,
+            *,
+            deferred_removal: bool = False,
+            durability: DurabilityPolicy = DEFAULT_DURABILITY
+    ) -> None:
+        self.folder.move(path, deferred_removal=deferred_removal, durability=durability)
 
 
 def parse_paths(paths: list[Path]) -> list[PathBased]:
@@ -0,0 +1,156 @@
+import struct
+from collections.abc import Iterator
+
+Box = tuple[str, int, int]
+
+
+class HeifError(ValueError):
+    pass
+
+
+def boxes(data: bytes | memoryview, start: int, end: int) -> Iterator[Box]:
+    offset = start
+
+    while offset + 8 <= end:
+        size, type_bytes = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, offset + 8)
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+
+        if size < header_size or offset + size > end:
+            raise HeifError(f"malformed box at {offset}")
+
+        yield type_bytes.decode("latin-1"), offset + header_size, offset + size
+
+        offset += size
+
+
+def __find(data: bytes | memoryview, box_type: str, start: int, end: int) -> Box | None:
+    for box in boxes(data, start, end):
+        if box[0] == box_type:
+            return box
+
+    return None
+
+
+def __read_uint(data: bytes | memoryview, offset: int, size: int) -> int:
+    if size == 0:
+        return 0
+
+    return int.from_bytes(data[offset:offset + size], "big")
+
+
+def __exif_item_id(data: bytes | memoryview, start: int, end: int) -> int | None:
+    version = data[start]
+    offset = start + 4
+
+    if version == 0:
+        offset += 2
+    else:
+        offset += 4
+
+    for box_type, entry_start, _ in boxes(data, offset, end):
+        if box_type != "infe":
+            continue
+
+        entry_version = data[entry_start]
+
+        # item types only exist from version 2 of the item info entry
+        if entry_version < 2:
+            continue
+
+        id_size = 2 if entry_version == 2 else 4
+        item_id = __read_uint(data, entry_start + 4, id_size)
+        item_type = bytes(data[entry_start + 4 + id_size + 2:entry_start + 4 + id_size + 6])
+
+        if item_type == b"Exif":
+            return item_id
+
+    return None
+
+
+def __item_offset(data: bytes | memoryview, start: int, item_id: int) -> int | None:
+    version = data[start]
+
+    offset_size = data[start + 4] >> 4
+    length_size = data[start + 4] & 0x0F
+    base_offset_size = data[start + 5] >> 4
+    index_size = data[start + 5] & 0x0F if version in (1, 2) else 0
+
+    offset = start + 6
+    count_size = 2 if version < 2 else 4
+    item_count = __read_uint(data, offset, count_size)
+    offset += count_size
+
+    for _ in range(item_count):
+        current_id = __read_uint(data, offset, count_size)
+        offset += count_size
+
+        construction_method = 0
+
+        if version in (1, 2):
+            construction_method = __read_uint(data, offset, 2) & 0x0F
+            offset += 2
+
+        offset += 2  # data reference index
+
+        base_offset = __read_uint(data, offset, base_offset_size)
+        offset += base_offset_size
+
+        extent_count = __read_uint(data, offset, 2)
+        offset += 2
+
+        extents = []
+
+        for _ in range(extent_count):
+            offset += index_size
+
+            extents.append(__read_uint(data, offset, offset_size))
+            offset += offset_size + length_size
+
+        if current_id == item_id:
+            # only items stored in the file itself are supported, not ones in the idat box
+            if construction_method != 0 or not extents:
+                return None
+
+            return base_offset + extents[0]
+
+    return None
+
+
+def exif_tiff_offset(data: bytes | memoryview) -> int | None:
+    try:
+        meta = __find(data, "meta", 0, len(data))
+
+        if meta is None:
+            return None
+
+        _, meta_start, meta_end = meta
+        meta_start += 4  # full box version and flags
+
+        iinf = __find(data, "iinf", meta_start, meta_end)
+        iloc = __find(data, "iloc", meta_start, meta_end)
+
+        if iinf is None or iloc is None:
+            return None
+
+        item_id = __exif_item_id(data, iinf[1], iinf[2])
+
+        if item_id is None:
+            return None
+
+        item_offset = __item_offset(data, iloc[1], item_id)
+
+        if item_offset is None:
+            return None
+
+        # the exif item starts with the offset of the tiff header after the "Exif\0\0" prefix
+        (header_offset,) = struct.unpack_from(">I", data, item_offset)
+    except (struct.error, IndexError) as e:
+        raise HeifError("malformed HEIF") from e
+
+    return item_offset + 4 + header_offset
@@ -1,62 +1,388 @@
-import itertools
-from collections.abc import Callable, Iterable
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Callable, Hashable, Iterable, Iterator, Sequence, Sized
+from enum import Enum
+from itertools import groupby, product
 from typing import Any, TypeVar
 
+from justin_utils import util
+
 T = TypeVar("T")
 V = TypeVar("V")
 
+Key = Callable[[Any], Hashable]
+
+
+class JoinMode(Enum):
+    # (keep unmatched left, keep unmatched right)
+    INNER = (False, False)
+    LEFT = (True, False)
+    RIGHT = (False, True)
+    FULL_OUTER = (True, True)
+
+
+class AsofDirection(Enum):
+    BACKWARD = "backward"
+    FORWARD = "forward"
+    NEAREST = "nearest"
+
+
+def __nested_loop(
+        seq1: Iterable[T],
+        seq2: Iterable[V],
+        on: Callable[[T, V], bool],
+        keep_left: bool,
+        keep_right: bool
+) -> Iterator[tuple[Any, Any]]:
+    rights = list(seq2)
+    right_matched = [False] * len(rights)
+
+    for left_element in seq1:
+        matched = False
+
+        for j, right_element in enumerate(rights):
+            if on(left_element, right_element):
+                matched = right_matched[j] = True
+
+                yield left_element, right_element
+
+        if keep_left and not matched:
+            yield left_element, None
+
+    if keep_right:
+        yield from ((None, element) for element, matched in zip(rights, right_matched, strict=True) if not matched)
+
+
+def __probe(
+        probe: Iterable[Any],
+        build: Iterable[Any],
+        probe_key: Key,
+        build_key: Key,
+        keep_probe: bool,
+        keep_build: bool
+) -> Iterator[tuple[Any, Any]]:
+    built = list(build)
+    build_matched = [False] * len(built)
+
+    table: defaultdict[Hashable, list[int]] = defaultdict(list)
+
+    for j, element in enumerate(built):
+        table[build_key(element)].append(j)
+
+    for element in probe:
+        indices = table.get(probe_key(element), ())
+
+        for j in indices:
+            build_matched[j] = True
+
+            yield element, built[j]
+
+        if keep_probe and not indices:
+            yield element, None
+
+    # the build side is only known to be unmatched once the probe side is exhausted
+    if keep_build:
+        yield from ((None, element) for element, matched in zip(built, build_matched, strict=True) if not matched)
+
+
+def __hash_join(
+        seq1: Iterable[T],
+        seq2: Iterable[V],
+        left_key: Key,
+        right_key: Key,
+        keep_left: bool,
+        keep_right: bool
+) -> Iterator[tuple[Any, Any]]:
+    # the right side is held in memory and the left one streamed, unless both are sized and the left is smaller
+    if isinstance(seq1, Sized) and isinstance(seq2, Sized) and len(seq1) < len(seq2):
+        swapped = __probe(seq2, seq1, right_key, left_key, keep_right, keep_left)
+
+        return ((left_element, right_element) for right_element, left_element in swapped)
+
+    return __probe(seq1, seq2, left_key, right_key, keep_left, keep_right)
+
+
+def __keys(
+        on: Callable[[Any, Any], bool] | None,
+        left_key: Key | None,
+        right_key: Key | None
+) -> tuple[Key, Key] | None:
+    if left_key is None and right_key is None:
+        assert on is not None, "either a predicate or key functions are required"
+
+        return None
+
+    assert on is None, "a predicate can't be combined with key functions"
+
+    # a single key function is used for both sides
+    return left_key or right_key, right_key or left_key  # type: ignore[return-value]
+
+
+def __join(
+        seq1: Iterable[T],
+        seq2: Iterable[V],
+        on: Callable[[T, V], bool] | None,
+        left_key: Key | None,
+        right_key: Key | None,
+        keep_left: bool,
+        keep_right: bool
+) -> Iterator[tuple[T, V]]:
+    keys = __keys(on, left_key, right_key)
+
+    if keys is None:
+        return __nested_loop(seq1, seq2, on, keep_left, keep_right)  # type: ignore[arg-type]
+
+    return __hash_join(seq1, seq2, *keys, keep_left, keep_right)
+
+
+def full_outer(
+        seq1: Iterable[T],
+        seq2: Iterable[V],
+        on: Callable[[T, V], bool] | None = None,
+        *,
+        left_key: Callable[[T], Hashable] | None = None,
+        right_key: Callable[[V], Hashable] | None = None
+) -> Iterator[tuple[T, V]]:
+    return __join(seq1, seq2, on, left_key, right_key, keep_left=True, keep_right=True)
+
+
+def inner(
+        seq1: Iterable[T],
+        seq2: Iterable[V],
+        on: Callable[[T, V], bool] | None = None,
+        *,
+        left_key: Callable[[T], Hashable] | None = None,
+        right_key: Callable[[V], Hashable] | None = None
+) -> Iterator[tuple[T, V]]:
+    return __join(seq1, seq2, on, left_key, right_key, keep_left=False, keep_right=False)
+
+
+def left(
+        seq1: Iterable[T],
+        seq2: Iterable[V],
+        on: Callable[[T, V], bool] | None = None,
+        *,
+        left_key: Callable[[T], Hashable] | None = None,
+        right_key: Callable[[V], Hashable] | None = None
+) -> Iterator[tuple[T, V]]:
+    return __join(seq1, seq2, on, left_key, right_key, keep_left=True, keep_right=False)
+
+
+def right(
+        seq1: Iterable[T],
+        seq2: Iterable[V],
+        on: Callable[[T, V], bool] | None = None,
+        *,
+        left_key: Callable[[T], Hashable] | None = None,
+        right_key: Callable[[V], Hashable] | None = None
+) -> Iterator[tuple[T, V]]:
+    return __join(seq1, seq2, on, left_key, right_key, keep_left=False, keep_right=True)
+
+
+def __checked_groups(seq: Iterable[T], key: Callable[[T], Any]) -> Iterator[tuple[Any, Iterator[T]]]:
+    previous: Any = None
+
+    for index, (group_key, group) in enumerate(groupby(seq, key=key)):
+        if index > 0 and group_key < previous:
+            raise ValueError(f"merge join input is not sorted: {group_key!r} after {previous!r}")
+
+        previous = group_key
+
+        yield group_key, group
+
+
+def merge_join(
+        seq1: Iterable[T],
+        seq2: Iterable[V],
+        *,
+        left_key: Callable[[T], Any],
+        right_key: Callable[[V], Any] | None = None,
+        mode: JoinMode = JoinMode.INNER,
+        presorted: bool = True,
+        chunk_size: int = 100_000
+) -> Iterator[tuple[T | None, V | None]]:
+    keep_left, keep_right = mode.value
+    other_key: Callable[[Any], Any] = right_key or left_key
+
+    if not presorted:
+        # elements are spilled to disk between sorting and merging, so they must be picklable
+        seq1 = util.external_sorted(seq1, left_key, chunk_size)
+        seq2 = util.external_sorted(seq2, other_key, chunk_size)
+
+    lefts = __checked_groups(seq1, left_key)
+    rights = __checked_groups(seq2, other_key)
+
+    left_group = next(lefts, None)
+    right_group = next(rights, None)
+
+    # only the current run of equal right keys is held in memory
+    while left_group is not None and right_group is not None:
+        (current_left_key, left_elements), (current_right_key, right_elements) = left_group, right_group
+
+        if current_left_key < current_right_key:
+            if keep_left:
+                yield from ((element, None) for element in left_elements)
+
+            left_group = next(lefts, None)
+        elif current_right_key < current_left_key:
+            if keep_right:
+                yield from ((None, element) for element in right_elements)
+
+            right_group = next(rights, None)
+        else:
+            matched = list(right_elements)
+
+            for left_element in left_elements:
+                for right_element in matched:
+                    yield left_element, right_element
+
+            left_group = next(lefts, None)
+            right_group = next(rights, None)
+
+    if keep_left:
+        while left_group is not None:
+            yield from ((element, None) for element in left_group[1])
+
+            left_group = next(lefts, None)
+
+    if keep_right:
+        while right_group is not None:
+            yield from ((None, element) for element in right_group[1])
+
+            right_group = next(rights, None)
+
+
+def __sorted_by_key(seq: Iterable[Any], key: Callable[[Any], float]) -> tuple[list[Any], list[float]]:
+    keyed = sorted(((key(element), element) for element in seq), key=lambda pair: pair[0])
+
+    return [element for _, element in keyed], [element_key for element_key, _ in keyed]
+
+
+def window_join(
+        seq1: Iterable[T],
+        seq2: Iterable[V],
+        *,
+        left_key: Callable[[T], float],
+        right_key: Callable[[V], float] | None = None,
+        window: float,
+        mode: JoinMode = JoinMode.INNER
+) -> Iterator[tuple[T | None, V | None]]:
+    keep_left, keep_right = mode.value
+
+    rights, keys = __sorted_by_key(seq2, right_key or left_key)
+    right_matched = bytearray(len(rights))
+
+    # the left side is streamed in any order, each element finds its window in the sorted right side by bisection
+    for left_element in seq1:
+        key = left_key(left_element)
+
+        start = bisect_left(keys, key - window)
+        end = bisect_right(keys, key + window, lo=start)
+
+        for j in range(start, end):
+            right_matched[j] = True
+
+            yield left_element, rights[j]
+
+        if keep_left and start == end:
+            yield left_element, None
+
+    if keep_right:
+        yield from ((None, element) for element, matched in zip(rights, right_matched, strict=True) if not matched)
+
+
+def asof_join(
+        seq1: Iterable[T],
+        seq2: Iterable[V],
+        *,
+        left_key: Callable[[T], float],
+        right_key: Callable[[V], float] | None = None,
+        direction: AsofDirection = AsofDirection.NEAREST,
+        tolerance: float | None = None
+) -> Iterator[tuple[T, V | None]]:
+    rights, keys = __sorted_by_key(seq2, right_key or left_key)
+
+    for left_element in seq1:
+        key = left_key(left_element)
+
+        candidates = []
+
+        if direction != AsofDirection.FORWARD:
+            before = bisect_right(keys, key) - 1
+
+            if before >= 0:
+                candidates.append(before)
+
+        if direction != AsofDirection.BACKWARD:
+            after = bisect_left(keys, key)
+
+            if after < len(keys):
+                candidates.append(after)
+
+        # on a tie the earlier right element wins
+        best = min(candidates, key=lambda j: abs(keys[j] - key), default=None)
 
-# todo: rewrite in lazy way
+        if best is not None and tolerance is not None and abs(keys[best] - key) > tolerance:
+            best = None
 
-def full_outer(seq1: Iterable[T], seq2: Iterable[V], on: Callable[[T, V], bool]) -> list[tuple[T, V]]:
-    sequences = [seq1, seq2]
+        yield left_element, None if best is None else rights[best]
 
-    inclusion_mapping = [{e: False for e in seq} for seq in [seq1, seq2]]
 
-    result = itertools.product(*sequences)
+Keyed = Iterable[tuple[Hashable, Any]]
 
-    def unwrapper(t: Any) -> bool:
-        return on(*t)
 
-    result = list(filter(unwrapper, result))  # type: ignore[assignment]
+def __keyed(seq: Iterable[Any], key: Key) -> Iterator[tuple[Hashable, Any]]:
+    return ((key(element), element) for element in seq)
 
-    for joining in result:
-        for i, element in enumerate(joining):
-            inclusion_mapping[i][element] = True
 
-    for i in range(len(sequences)):
-        for element, state in inclusion_mapping[i].items():
-            if not state:
-                pre_tuple: list[Any] = [None for _ in sequences]
+def __keyed_multi_join(first: Keyed, others: Sequence[Keyed], keep_unmatched: bool) -> Iterator[tuple[Any, ...]]:
+    tables = []
 
-                pre_tuple[i] = element
+    for other in others:
+        table: defaultdict[Hashable, list[Any]] = defaultdict(list)
 
-                joining = tuple(pre_tuple)
+        for key, element in other:
+            table[key].append(element)
 
-                result.append(joining)  # type: ignore[attr-defined]
+        tables.append(table)
 
-    return result  # type: ignore[return-value]
+    missing = [None]
 
+    for key, element in first:
+        matches = []
 
-def __has_left(pair: tuple[Any, Any]) -> bool:
-    return pair[0] is not None
+        for table in tables:
+            found = table.get(key)
 
+            if not found:
+                if not keep_unmatched:
+                    break
 
-def __has_right(pair: tuple[Any, Any]) -> bool:
-    return pair[1] is not None
+                found = missing
 
+            matches.append(found)
+        else:
+            for combination in product(*matches):
+                yield element, *combination
 
-def __has_both(pair: tuple[Any, Any]) -> bool:
-    return __has_left(pair) and __has_right(pair)
 
+def multi_join(
+        first: Iterable[Any],
+        *others: Iterable[Any],
+        keys: Key | Sequence[Key],
+        mode: JoinMode = JoinMode.LEFT
+) -> Iterator[tuple[Any, ...]]:
+    assert mode in (JoinMode.INNER, JoinMode.LEFT), "n-way joins are driven by the first input"
 
-def inner(seq1: Iterable[T], seq2: Iterable[V], on: Callable[[T, V], bool]) -> Iterable[tuple[T, V]]:
-    return [i for i in full_outer(seq1, seq2, on) if __has_both(i)]
+    keep_unmatched, _ = mode.value
 
+    if callable(keys):
+        key_functions = [keys] * (len(others) + 1)
+    else:
+        key_functions = list(keys)
 
-def left(seq1: Iterable[T], seq2: Iterable[V], on: Callable[[T, V], bool]) -> Iterable[tuple[T, V]]:
-    return [i for i in full_outer(seq1, seq2, on) if __has_left(i)]
+    assert len(key_functions) == len(others) + 1, "one key function per input is required"
 
+    inputs = [__keyed(seq, key) for seq, key in zip((first, *others), key_functions, strict=True)]
 
-def right(seq1: Iterable[T], seq2: Iterable[V], on: Callable[[T, V], bool]) -> Iterable[tuple[T, V]]:
-    return [i for i in full_outer(seq1, seq2, on) if __has_right(i)]
+    return __keyed_multi_join(inputs[0], inputs[1:], keep_unmatched)
@@ -0,0 +1,219 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from pathlib import PurePath
+from typing import ClassVar
+
+Entry = os.DirEntry[str]
+
+
+class Rule(ABC):
+    @abstractmethod
+    def matches(self, relative_path: PurePath, entry: Entry) -> bool:
+        pass
+
+
+class PatternRule(Rule):
+    def __init__(self, pattern: str, *, case_sensitive: bool = True) -> None:
+        super().__init__()
+
+        self.pattern = pattern
+        self.dir_only = pattern.endswith("/")
+
+        pattern = pattern.rstrip("/")
+
+        # like in gitignore, a pattern with a slash is anchored to the scan root, otherwise it matches by name
+        self.anchored = "/" in pattern
+
+        flags = 0 if case_sensitive else re.IGNORECASE
+
+        self.__regex = re.compile(PatternRule.__translate(pattern.lstrip("/")), flags)
+
+    @staticmethod
+    def __translate(pattern: str) -> str:
+        result = ""
+        index = 0
+
+        while index < len(pattern):
+            if pattern.startswith("**/", index):
+                result += "(?:.*/)?"
+                index += 3
+            elif pattern.startswith("**", index):
+                result += ".*"
+                index += 2
+            elif pattern[index] == "*":
+                result += "[^/]*"
+                index += 1
+            elif pattern[index] == "?":
+                result += "[^/]"
+                index += 1
+            elif pattern[index] == "[" and "]" in pattern[index + 1:]:
+                end = pattern.index("]", index + 1)
+                content = pattern[index + 1:end].replace("\\", "\\\\")
+
+                # only a leading "!" negates the set, a leading "^" is literal in glob but special in regex
+                if content.startswith("!"):
+                    content = "^" + content[1:]
+                elif content.startswith("^"):
+                    content = "\\" + content
+
+                result += "[" + content + "]"
+                index = end + 1
+            else:
+                result += re.escape(pattern[index])
+                index += 1
+
+        return result
+
+    def matches(self, relative_path: PurePath, entry: Entry) -> bool:
+        if self.dir_only and not entry.is_dir():
+            return False
+
+        if self.anchored:
+            subject = relative_path.as_posix()
+        else:
+            subject = entry.name
+
+        return self.__regex.fullmatch(subject) is not None
+
+    def __repr__(self) -> str:
+        return f"PatternRule({self.pattern})"
+
+
+class ExtensionRule(Rule):
+    def __init__(self, extensions: Iterable[str]) -> None:
+        super().__init__()
+
+        self.extensions = frozenset(extension.lower() for extension in extensions)
+
+    def matches(self, relative_path: PurePath, entry: Entry) -> bool:
+        return entry.is_file() and relative_path.suffix.lower() in self.extensions
+
+
+class PredicateRule(Rule):
+    def __init__(self, predicate: Callable[[PurePath, Entry], bool]) -> None:
+        super().__init__()
+
+        self.predicate = predicate
+
+    def matches(self, relative_path: PurePath, entry: Entry) -> bool:
+        return self.predicate(relative_path, entry)
+
+
+class SizeRule(Rule):
+    def __init__(self, *, min_size: int | None = None, max_size: int | None = None) -> None:
+        super().__init__()
+
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def matches(self, relative_path: PurePath, entry: Entry) -> bool:
+        if not entry.is_file():
+            return False
+
+        size = entry.stat().st_size
+
+        if self.min_size is not None and size < self.min_size:
+            return False
+
+        return self.max_size is None or size <= self.max_size
+
+
+class MtimeRule(Rule):
+    def __init__(self, *, after: datetime | None = None, before: datetime | None = None) -> None:
+        super().__init__()
+
+        self.after = after
+        self.before = before
+
+    def matches(self, relative_path: PurePath, entry: Entry) -> bool:
+        if not entry.is_file():
+            return False
+
+        mtime = entry.stat().st_mtime
+
+        if self.after is not None and mtime < self.after.timestamp():
+            return False
+
+        return self.before is None or mtime < self.before.timestamp()
+
+
+class Negated(Rule):
+    def __init__(self, rule: Rule) -> None:
+        super().__init__()
+
+        self.rule = rule
+
+    def matches(self, relative_path: PurePath, entry: Entry) -> bool:
+        return self.rule.matches(relative_path, entry)
+
+
+def is_metafile(relative_path: PurePath, entry: Entry) -> bool:
+    return entry.is_file() and relative_path.stem.lower() == "_meta"
+
+
+class ScanRules:
+    DEFAULT_JUNK: ClassVar[tuple[str, ...]] = (
+        ".DS_store",
+        "NC_FLLST.DAT",
+    )
+
+    def __init__(
+            self,
+            ignore: Iterable[Rule] = (),
+            include: Iterable[Rule] = (),
+            junk: Iterable[str] = ()
+    ) -> None:
+        super().__init__()
+
+        self.ignore = list(ignore)
+        self.include = list(include)
+        self.junk = frozenset(name.lower() for name in junk)
+
+    @classmethod
+    def default(cls) -> 'ScanRules':
+        return DEFAULT_SCAN_RULES
+
+    @classmethod
+    def from_patterns(
+            cls,
+            lines: Iterable[str],
+            *,
+            include: Iterable[Rule] = (),
+            junk: Iterable[str] = DEFAULT_JUNK
+    ) -> 'ScanRules':
+        ignore: list[Rule] = [PredicateRule(is_metafile)]
+
+        for line in lines:
+            line = line.strip()
+
+            if not line or line.startswith("#"):
+                continue
+
+            if line.startswith("!"):
+                ignore.append(Negated(PatternRule(line[1:])))
+            else:
+                ignore.append(PatternRule(line))
+
+        return cls(ignore=ignore, include=include, junk=junk)
+
+    def is_junk(self, entry: Entry) -> bool:
+        return entry.is_file() and entry.name.lower() in self.junk
+
+    def is_excluded(self, relative_path: PurePath, entry: Entry) -> bool:
+        # the last matching rule wins, so a negated rule re-includes what an earlier one ignored
+        excluded = False
+
+        for rule in self.ignore:
+            if rule.matches(relative_path, entry):
+                excluded = not isinstance(rule, Negated)
+
+        if excluded or entry.is_dir() or not self.include:
+            return excluded
+
+        return not any(rule.matches(relative_path, entry) for rule in self.include)
+
+
+DEFAULT_SCAN_RULES = ScanRules(ignore=[PredicateRule(is_metafile)], junk=ScanRules.DEFAULT_JUNK)
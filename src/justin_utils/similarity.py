@@ -0,0 +1,186 @@
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Generic, TypeVar
+
+from PIL import Image
+
+from justin_utils.exif import read_preview
+from justin_utils.sources import Source
+
+T = TypeVar("T")
+
+HASH_SIZE = 8
+
+# large enough for the bilinear downscale to average over the frame, small enough for JPEG draft mode to skip most
+# of the decode
+__DRAFT_SIZE = (HASH_SIZE * 8, HASH_SIZE * 8)
+
+
+def hamming(first: int, second: int) -> int:
+    return (first ^ second).bit_count()
+
+
+def dhash(image: Image.Image, size: int = HASH_SIZE) -> int:
+    grey = image.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR)
+    pixels = grey.tobytes()
+
+    value = 0
+
+    for row in range(size):
+        offset = row * (size + 1)
+
+        for column in range(offset, offset + size):
+            value = value << 1 | (pixels[column] > pixels[column + 1])
+
+    return value
+
+
+def hash_image(path: Path) -> int | None:
+    preview = None
+
+    try:
+        preview = read_preview(path, largest=False)
+
+        # the exif thumbnail is plenty for a 9x8 hash; whole jpegs are decoded straight at 1/2..1/8 scale instead
+        if preview is not None and len(preview) < path.stat().st_size:
+            image_file: Path | BytesIO = BytesIO(preview)
+        else:
+            image_file = path
+
+        with Image.open(image_file) as image:
+            image.draft("L", __DRAFT_SIZE)
+
+            return dhash(image)
+    except (OSError, ValueError):
+        return None
+    finally:
+        if preview is not None:
+            preview.release()
+
+
+class BKTree(Generic[T]):
+    def __init__(self, distance: Callable[[int, int], int] = hamming) -> None:
+        super().__init__()
+
+        self.__distance = distance
+        self.__root: tuple[int, T, dict[int, tuple]] | None = None
+        self.__size = 0
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def add(self, key: int, value: T) -> None:
+        self.__size += 1
+
+        if self.__root is None:
+            self.__root = (key, value, {})
+
+            return
+
+        node = self.__root
+
+        while True:
+            node_key, _, children = node
+            distance = self.__distance(key, node_key)
+
+            if distance not in children:
+                children[distance] = (key, value, {})
+
+                return
+
+            node = children[distance]
+
+    def search(self, key: int, max_distance: int) -> list[tuple[int, T]]:
+        if self.__root is None:
+            return []
+
+        found = []
+        pending = [self.__root]
+
+        while pending:
+            node_key, value, children = pending.pop()
+            distance = self.__distance(key, node_key)
+
+            if distance <= max_distance:
+                found.append((distance, value))
+
+            # triangle inequality: only subtrees within max_distance of the node's ring can hold matches
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    pending.append(child)
+
+        found.sort(key=lambda pair: pair[0])
+
+        return found
+
+
+class SimilarityIndex:
+    def __init__(self, workers: int | None = None) -> None:
+        super().__init__()
+
+        self.__workers = workers
+
+        self.__sources: list[Source] = []
+        self.__hashes = array("Q")
+        self.__tree: BKTree[int] = BKTree()
+
+    def __len__(self) -> int:
+        return len(self.__sources)
+
+    def __iter__(self) -> Iterator[tuple[Source, int]]:
+        return zip(self.__sources, self.__hashes, strict=True)
+
+    def add(self, sources: Iterable[Source]) -> list[Source]:
+        sources = list(sources)
+
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            hashes = list(executor.map(hash_image, [source.exif_path for source in sources]))
+
+        skipped = []
+
+        for source, image_hash in zip(sources, hashes, strict=True):
+            if image_hash is None:
+                skipped.append(source)
+
+                continue
+
+            self.__tree.add(image_hash, len(self.__sources))
+
+            self.__sources.append(source)
+            self.__hashes.append(image_hash)
+
+        return skipped
+
+    def hash_of(self, source: Source) -> int | None:
+        for indexed, image_hash in self:
+            if indexed is source:
+                return image_hash
+
+        return None
+
+    def neighbours(self, image_hash: int, max_distance: int) -> list[tuple[Source, int]]:
+        return [(self.__sources[index], distance) for distance, index in self.__tree.search(image_hash, max_distance)]
+
+    def duplicates(self, max_distance: int) -> list[list[Source]]:
+        parents = list(range(len(self.__sources)))
+
+        def root(index: int) -> int:
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+
+            return index
+
+        for index, image_hash in enumerate(self.__hashes):
+            for _, other in self.__tree.search(image_hash, max_distance):
+                parents[root(other)] = root(index)
+
+        groups: dict[int, list[Source]] = {}
+
+        for index, source in enumerate(self.__sources):
+            groups.setdefault(root(index), []).append(source)
+
+        return [group for group in groups.values() if len(group) > 1]
@@ -1,12 +1,31 @@
 from abc import abstractmethod
-from collections.abc import Iterable
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+from datetime import timedelta
 from functools import cached_property
-from pathlib import Path
+from pathlib import Path, PurePath
 from typing import ClassVar
 
-from justin_utils import joins, util
-from justin_utils.exif import Exif, parse_exif
-from justin_utils.filesystem import File, Movable
+from justin_utils.exif import (
+    Exif,
+    ExifCache,
+    capture_timestamp,
+    parse_exif,
+    parse_exif_batch,
+    read_preview,
+    read_previews,
+)
+from justin_utils.filesystem import (
+    DEFAULT_DURABILITY,
+    DurabilityPolicy,
+    File,
+    Folder,
+    Movable,
+    copy_files,
+    move_files,
+    scan_folder,
+)
+from justin_utils.xmp import XmpMetadata, parse_xmp
 
 
 class Source(Movable):
@@ -21,9 +40,27 @@ class Source(Movable):
         pass
 
     @property
-    @abstractmethod
+    def exif_path(self) -> Path:
+        # the primary file comes first, subclasses that predate exif_path and override exif keep working
+        return self.files()[0].path
+
+    @cached_property
     def exif(self) -> Exif | None:
-        pass
+        return parse_exif(self.exif_path)
+
+    @property
+    def xmp(self) -> XmpMetadata | None:
+        return None
+
+    @property
+    def exif_loaded(self) -> bool:
+        return "exif" in self.__dict__
+
+    def preload_exif(self, exif: Exif | None) -> None:
+        self.__dict__["exif"] = exif
+
+    def preview(self, *, largest: bool = True) -> memoryview | None:
+        return read_preview(self.exif_path, largest=largest)
 
     @property
     def stem(self) -> str:
@@ -84,9 +121,9 @@ class InternalMetadataSource(Source):
     def files(self) -> list[File]:
         return [self.__file]
 
-    @cached_property
-    def exif(self) -> Exif | None:
-        return parse_exif(self.__file.path)
+    @property
+    def exif_path(self) -> Path:
+        return self.__file.path
 
 
 class ExternalMetadataSource(Source):
@@ -100,21 +137,29 @@ class ExternalMetadataSource(Source):
         ".xmp",
     ]
 
-    def __init__(self, raw: File, metadata: File | None):
+    def __init__(self, raw: File, metadata: File | None, extra_metadata: Iterable[File] = ()):
         super().__init__()
 
         assert raw.extension != ".jpg"
 
-        if metadata is not None:
-            assert raw.stem == metadata.stem
-
         self.raw = raw
-        self.metadata = metadata
+        self.sidecars = [] if metadata is None else [metadata]
+        self.sidecars += extra_metadata
+
+        for sidecar in self.sidecars:
+            assert source_key(sidecar) == source_key(raw)
+
+    @property
+    def metadata(self) -> File | None:
+        if not self.sidecars:
+            return None
+
+        return self.sidecars[0]
 
     @property
     def mtime(self) -> float:
-        if self.metadata is not None:
-            return self.metadata.mtime
+        if self.sidecars:
+            return max(sidecar.mtime for sidecar in self.sidecars)
         else:
             return -1.0
 
@@ -122,36 +167,219 @@ class ExternalMetadataSource(Source):
     def name(self) -> str:
         return self.raw.stem
 
-    @cached_property
-    def exif(self) -> Exif | None:
-        return parse_exif(self.raw.path)
+    @property
+    def exif_path(self) -> Path:
+        return self.raw.path
+
+    @property
+    def xmp(self) -> XmpMetadata | None:
+        if self.metadata is None:
+            return None
+
+        return parse_xmp(self.metadata.path)
 
     def files(self) -> list[File]:
-        files = [self.raw]
+        return [self.raw, *self.sidecars]
+
+
+SourceKey = tuple[Path, str]
+
+
+def source_key(file: File) -> SourceKey:
+    stem = file.stem
+    inner_suffix = Path(stem).suffix
+
+    # darktable and Capture One name sidecars "photo.NEF.xmp"
+    if file.extension.lower() in ExternalMetadataSource.METADATA_TYPES \
+            and inner_suffix.lower() in ExternalMetadataSource.RAW_TYPES:
+        stem = stem[:-len(inner_suffix)]
+
+    return file.path.parent, stem.lower()
+
+
+def __belongs_to(sidecar: File, raw: File) -> bool:
+    inner_suffix = Path(sidecar.stem).suffix.lower()
+
+    return inner_suffix not in ExternalMetadataSource.RAW_TYPES or inner_suffix == raw.extension.lower()
+
+
+def pair_sidecars(raws: Iterable[File], sidecars: Iterable[File]) -> Iterator[ExternalMetadataSource]:
+    sidecars_by_key: dict[SourceKey, list[File]] = {}
+
+    for sidecar in sidecars:
+        sidecars_by_key.setdefault(source_key(sidecar), []).append(sidecar)
+
+    for raw in raws:
+        metadata = [sidecar for sidecar in sidecars_by_key.get(source_key(raw), []) if __belongs_to(sidecar, raw)]
+        metadata.sort(key=lambda sidecar: len(sidecar.name))
+
+        if metadata:
+            yield ExternalMetadataSource(raw, metadata[0], metadata[1:])
+        else:
+            yield ExternalMetadataSource(raw, None)
+
 
-        if self.metadata is not None:
-            files.append(self.metadata)
+def iter_sources(seq: Iterable[File]) -> Iterator[Source]:
+    raws: list[File] = []
+    sidecars: list[File] = []
 
-        return files
+    for file in seq:
+        extension = file.extension.lower()
+
+        if extension in InternalMetadataSource.TYPES:
+            yield InternalMetadataSource(file)
+        elif extension in ExternalMetadataSource.RAW_TYPES:
+            raws.append(file)
+        elif extension in ExternalMetadataSource.METADATA_TYPES:
+            sidecars.append(file)
+
+    # a raw is complete only when the input is exhausted, since its sidecars may come in any order
+    yield from pair_sidecars(raws, sidecars)
 
 
 def parse_sources(seq: Iterable[File]) -> list[Source]:
-    split = list(util.split_by_predicates(
-        seq,
-        lambda file: file.extension.lower() in ExternalMetadataSource.RAW_TYPES,
-        lambda file: file.extension.lower() in ExternalMetadataSource.METADATA_TYPES,
-        lambda file: file.extension.lower() in InternalMetadataSource.TYPES
-    ))
-
-    join = joins.left(
-        split[0],
-        split[1],
-        lambda raw, xmp: raw.stem == xmp.stem
+    return list(iter_sources(seq))
+
+
+def discover_sources(folder: Folder) -> Iterator[Source]:
+    rules = folder.rules
+    pending = [(folder.path, PurePath())]
+
+    while pending:
+        path, prefix = pending.pop()
+
+        files: list[File] = []
+        subfolders: list[tuple[Path, PurePath]] = []
+
+        # the same scan as Folder.refresh, so both apply the rules alike and remove junk files
+        for entry, relative_path in scan_folder(path, rules, prefix):
+            if entry.is_dir():
+                subfolders.append((Path(entry.path), relative_path))
+            elif entry.is_file():
+                files.append(File(Path(entry.path)))
+
+        # sidecars always sit next to their raws, so a finished directory can be paired on its own
+        yield from iter_sources(files)
+
+        pending += reversed(subfolders)
+
+
+def move_sources(
+        sources: Iterable[Source],
+        path: Path,
+        *,
+        workers: int | None = None,
+        durability: DurabilityPolicy = DEFAULT_DURABILITY
+) -> dict[Source, OSError]:
+    sources = list(sources)
+    path = path.absolute()
+
+    errors = move_files(
+        [[(file.path, path / file.name) for file in source.files()] for source in sources],
+        workers=workers,
+        durability=durability
     )
 
-    raws = [ExternalMetadataSource(raw, meta) for raw, meta in join]
-    jpegs = [InternalMetadataSource(jpeg) for jpeg in split[2]]
+    failed = {}
+
+    for source, error in zip(sources, errors, strict=True):
+        # a group that failed while removing its sources may have moved in part, so paths follow the files on disk
+        for file in source.files():
+            new_path = path / file.name
+
+            if error is None or (not file.path.exists() and new_path.exists()):
+                file.path = new_path
+
+        if error is not None:
+            failed[source] = error
+
+    return failed
+
+
+def copy_sources(
+        sources: Iterable[Source],
+        path: Path,
+        *,
+        workers: int | None = None,
+        durability: DurabilityPolicy = DEFAULT_DURABILITY
+) -> dict[Source, OSError]:
+    sources = list(sources)
+    path = path.absolute()
+
+    errors = copy_files(
+        [[(file.path, path / file.name) for file in source.files()] for source in sources],
+        workers=workers,
+        durability=durability
+    )
+
+    return {source: error for source, error in zip(sources, errors, strict=True) if error is not None}
+
+
+def iter_previews(
+        sources: Iterable[Source],
+        workers: int | None = None,
+        *,
+        largest: bool = True
+) -> Iterator[tuple[Source, memoryview | None]]:
+    sources = list(sources)
+    previews = read_previews([source.exif_path for source in sources], workers, largest=largest)
+
+    for source, (_, preview) in zip(sources, previews, strict=True):
+        yield source, preview
+
+
+def prefetch_exif(sources: Iterable[Source], workers: int | None = None, cache: ExifCache | None = None) -> None:
+    sources = [source for source in sources if not source.exif_loaded]
+
+    results = parse_exif_batch((source.exif_path for source in sources), workers, cache=cache)
+
+    for source, result in zip(sources, results, strict=True):
+        # failed files are left unloaded, so the error surfaces on access as before
+        if result.error is None:
+            source.preload_exif(result.exif)
+
+
+def group_by_time(
+        sources: Iterable[Source],
+        gap: timedelta,
+        *,
+        workers: int | None = None,
+        cache: ExifCache | None = None,
+        default_offset: timedelta | None = None,
+        clock_offsets: Mapping[str, timedelta] | None = None
+) -> list[list[Source]]:
+    sources = list(sources)
+
+    prefetch_exif(sources, workers, cache)
+
+    dated: list[Source] = []
+    undated: list[Source] = []
+    timestamps = array("q")
+
+    for source in sources:
+        timestamp = capture_timestamp(source.exif, default_offset=default_offset, clock_offsets=clock_offsets)
+
+        if timestamp is None:
+            undated.append(source)
+        else:
+            dated.append(source)
+            timestamps.append(timestamp)
+
+    order = sorted(range(len(dated)), key=timestamps.__getitem__)
+    max_gap = gap // timedelta(microseconds=1)
+
+    groups: list[list[Source]] = []
+    previous: int | None = None
+
+    for index in order:
+        if previous is None or timestamps[index] - previous > max_gap:
+            groups.append([])
+
+        groups[-1].append(dated[index])
+        previous = timestamps[index]
 
-    sources: list[Source] = [*raws, *jpegs]
+    # sources without a capture time can't be placed in a sequence, so they are kept together at the end
+    if undated:
+        groups.append(undated)
 
-    return sources
+    return groups
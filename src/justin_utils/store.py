@@ -0,0 +1,156 @@
+import hashlib
+import json
+import shutil
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import ClassVar
+
+from justin_utils.filesystem import File, Folder, copy
+
+IndexEntry = tuple[int, float, str]
+
+
+def hash_file(path: Path, algorithm: str = "sha256") -> str:
+    with path.open("rb") as file:
+        return hashlib.file_digest(file, algorithm).hexdigest()
+
+
+class ArchiveStore:
+    __OBJECTS_FOLDER = "objects"
+    __STAGING_FOLDER = "staging"
+    __INDEX_FILE = "index.json"
+
+    FAN_OUT: ClassVar[tuple[int, ...]] = (2, 2)
+
+    def __init__(self, root: Path, workers: int | None = None) -> None:
+        super().__init__()
+
+        self.__root = Folder(root)
+        self.__workers = workers
+
+        self.__index: dict[str, IndexEntry] = self.__load_index()
+
+    @property
+    def root(self) -> Folder:
+        return self.__root
+
+    @property
+    def __index_path(self) -> Path:
+        return self.root.path / ArchiveStore.__INDEX_FILE
+
+    def __load_index(self) -> dict[str, IndexEntry]:
+        if not self.__index_path.exists():
+            return {}
+
+        with self.__index_path.open() as index_file:
+            raw_index = json.load(index_file)
+
+        return {path: (size, mtime, digest) for path, (size, mtime, digest) in raw_index.items()}
+
+    def save(self) -> None:
+        self.root.mkdir()
+
+        tmp_path = self.__index_path.with_suffix(".tmp")
+
+        with tmp_path.open("w") as index_file:
+            json.dump(self.__index, index_file)
+
+        tmp_path.replace(self.__index_path)
+
+    def object_path(self, digest: str, suffix: str) -> Path:
+        path = self.root.path / ArchiveStore.__OBJECTS_FOLDER
+        start = 0
+
+        for width in ArchiveStore.FAN_OUT:
+            path /= digest[start:start + width]
+            start += width
+
+        return path / f"{digest}{suffix.lower()}"
+
+    def lookup(self, path: Path) -> str | None:
+        entry = self.__index.get(str(path.absolute()))
+
+        if entry is None:
+            return None
+
+        return entry[2]
+
+    def __cached_digest(self, file: File) -> str | None:
+        entry = self.__index.get(str(file.path))
+
+        if entry is None:
+            return None
+
+        size, mtime, digest = entry
+        stat = file.path.stat()
+
+        if (stat.st_size, stat.st_mtime) != (size, mtime):
+            return None
+
+        return digest
+
+    def __hash(self, file: File) -> IndexEntry:
+        stat = file.path.stat()
+
+        return stat.st_size, stat.st_mtime, hash_file(file.path)
+
+    def __store(self, file: File, digest: str) -> bool:
+        object_path = self.object_path(digest, file.suffix)
+
+        if object_path.exists():
+            return False
+
+        staging_folder = self.root / ArchiveStore.__STAGING_FOLDER / digest
+
+        # a leftover of an interrupted ingest may be a partial copy, so the file is always staged afresh
+        if staging_folder.exists():
+            shutil.rmtree(staging_folder.path)
+
+        copy(file.path, staging_folder.path)
+
+        staged_path = staging_folder.path / object_path.name
+
+        (staging_folder.path / file.name).rename(staged_path)
+
+        File(staged_path).move(object_path.parent)
+
+        staging_folder.path.rmdir()
+
+        return True
+
+    def ingest(self, files: Iterable[File]) -> dict[File, str]:
+        files = list(files)
+        digests: dict[File, str] = {}
+        to_hash: list[File] = []
+
+        for file in files:
+            digest = self.__cached_digest(file)
+
+            if digest is None:
+                to_hash.append(file)
+            else:
+                digests[file] = digest
+
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            for file, entry in zip(to_hash, executor.map(self.__hash, to_hash), strict=True):
+                self.__index[str(file.path)] = entry
+                digests[file] = entry[2]
+
+        stored = 0
+
+        for file in files:
+            if self.__store(file, digests[file]):
+                stored += 1
+
+        staging_path = self.root.path / ArchiveStore.__STAGING_FOLDER
+
+        # leftovers of interrupted ingests for files that weren't seen again are dropped as well
+        if staging_path.exists():
+            shutil.rmtree(staging_path)
+
+        print(f"Ingested {len(files)} files: {len(to_hash)} hashed, {stored} stored")
+
+        self.save()
+
+        return {file: digests[file] for file in files}
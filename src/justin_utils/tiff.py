@@ -0,0 +1,241 @@
+import struct
+from collections.abc import Container
+from typing import Any
+
+NEW_SUBFILE_TYPE = 0x00FE
+COMPRESSION = 0x0103
+MAKE = 0x010F
+MODEL = 0x0110
+STRIP_OFFSETS = 0x0111
+ORIENTATION = 0x0112
+STRIP_BYTE_COUNTS = 0x0117
+DATETIME = 0x0132
+SUB_IFDS = 0x014A
+JPEG_OFFSET = 0x0201
+JPEG_LENGTH = 0x0202
+EXIF_IFD = 0x8769
+DATETIME_ORIGINAL = 0x9003
+DATETIME_DIGITIZED = 0x9004
+OFFSET_TIME = 0x9010
+OFFSET_TIME_ORIGINAL = 0x9011
+SUBSEC_TIME_ORIGINAL = 0x9291
+LENS_MODEL = 0xA434
+
+ASCII = 2
+SHORT = 3
+LONG = 4
+RATIONAL = 5
+SIGNED_LONG = 9
+SIGNED_RATIONAL = 10
+
+TYPE_SIZES = {
+    1: 1,  # byte
+    ASCII: 1,
+    SHORT: 2,
+    LONG: 4,
+    RATIONAL: 8,
+    6: 1,  # signed byte
+    7: 1,  # undefined
+    8: 2,  # signed short
+    SIGNED_LONG: 4,
+    SIGNED_RATIONAL: 8,
+    11: 4,  # float
+    12: 8,  # double
+    13: 4,  # ifd
+}
+
+__ENTRY_SIZE = 12
+
+__JPEG_COMPRESSIONS = (6, 7)
+__REDUCED_RESOLUTION = 1
+
+
+class TiffError(ValueError):
+    pass
+
+
+def byte_order(data: bytes | memoryview, base: int = 0) -> str:
+    header = bytes(data[base:base + 4])
+
+    if header in (b"II*\x00", b"IIRO", b"IIU\x00"):
+        return "<"
+    elif header == b"MM\x00*":
+        return ">"
+    else:
+        raise TiffError(f"no TIFF header at {base}")
+
+
+def __first_ifd_offset(data: bytes | memoryview, order: str, base: int = 0) -> int:
+    try:
+        (offset,) = struct.unpack_from(order + "I", data, base + 4)
+    except struct.error as e:
+        raise TiffError(f"truncated TIFF header at {base}") from e
+
+    return offset
+
+
+def read_ifd(
+        data: bytes | memoryview,
+        offset: int,
+        order: str,
+        base: int = 0
+) -> tuple[dict[int, tuple[int, int, int]], int]:
+    start = base + offset
+
+    try:
+        (count,) = struct.unpack_from(order + "H", data, start)
+
+        entries = {}
+
+        for index in range(count):
+            tag, type_, value_count = struct.unpack_from(order + "HHI", data, start + 2 + index * __ENTRY_SIZE)
+
+            # the value is stored inline when it fits into the 4-byte offset field
+            value_position = start + 2 + index * __ENTRY_SIZE + 8
+            value_size = TYPE_SIZES.get(type_, 1) * value_count
+
+            if value_size > 4:
+                (value_offset,) = struct.unpack_from(order + "I", data, value_position)
+                value_position = base + value_offset
+
+            entries[tag] = (type_, value_count, value_position)
+
+        (next_offset,) = struct.unpack_from(order + "I", data, start + 2 + count * __ENTRY_SIZE)
+    except struct.error as e:
+        raise TiffError(f"truncated IFD at {start}") from e
+
+    return entries, next_offset
+
+
+def decode(data: bytes | memoryview, order: str, type_: int, count: int, position: int) -> Any:
+    size = TYPE_SIZES.get(type_, 1) * count
+
+    if position + size > len(data):
+        raise TiffError(f"value at {position} is out of range")
+
+    if type_ == ASCII:
+        return bytes(data[position:position + size]).split(b"\x00", 1)[0].decode("utf-8", "replace").strip()
+    elif type_ in (RATIONAL, SIGNED_RATIONAL):
+        code = "I" if type_ == RATIONAL else "i"
+        values = struct.unpack_from(f"{order}{2 * count}{code}", data, position)
+        result: Any = tuple(
+            numerator / denominator if denominator else 0.0
+            for numerator, denominator in zip(values[::2], values[1::2], strict=True)
+        )
+    elif type_ in (SHORT, LONG, SIGNED_LONG, 8, 13):
+        code = {SHORT: "H", LONG: "I", SIGNED_LONG: "i", 8: "h", 13: "I"}[type_]
+        result = struct.unpack_from(f"{order}{count}{code}", data, position)
+    else:
+        return bytes(data[position:position + size])
+
+    if count == 1:
+        return result[0]
+
+    return result
+
+
+RawEntry = tuple[int, int, bytes]
+
+
+def read_entries(data: bytes | memoryview, tags: Container[int], base: int = 0) -> tuple[str, dict[int, RawEntry]]:
+    order = byte_order(data, base)
+
+    ifd0_offset = __first_ifd_offset(data, order, base)
+
+    entries, _ = read_ifd(data, ifd0_offset, order, base)
+
+    if EXIF_IFD in entries:
+        type_, count, position = entries[EXIF_IFD]
+
+        exif_entries, _ = read_ifd(data, decode(data, order, type_, count, position), order, base)
+
+        entries.update(exif_entries)
+
+    raw_entries = {}
+
+    # only the raw bytes are copied, so values can be decoded later without holding on to the file
+    for tag, (type_, count, position) in entries.items():
+        if tag not in tags:
+            continue
+
+        size = TYPE_SIZES.get(type_, 1) * count
+
+        if position + size > len(data):
+            raise TiffError(f"value at {position} is out of range")
+
+        raw_entries[tag] = (type_, count, bytes(data[position:position + size]))
+
+    return order, raw_entries
+
+
+def read_tags(data: bytes | memoryview, tags: Container[int], base: int = 0) -> dict[int, Any]:
+    order, entries = read_entries(data, tags, base)
+
+    return {tag: decode(raw, order, type_, count, 0) for tag, (type_, count, raw) in entries.items()}
+
+
+def __jpeg_range(
+        data: bytes | memoryview,
+        entries: dict[int, tuple[int, int, int]],
+        order: str,
+        base: int
+) -> tuple[int, int] | None:
+    def value(tag: int) -> Any:
+        return decode(data, order, *entries[tag])
+
+    if JPEG_OFFSET in entries and JPEG_LENGTH in entries:
+        start, length = base + value(JPEG_OFFSET), value(JPEG_LENGTH)
+    elif STRIP_OFFSETS in entries and STRIP_BYTE_COUNTS in entries and COMPRESSION in entries:
+        # a single-strip jpeg in a reduced-resolution ifd is a preview, the full-size one is the raw data itself
+        if value(COMPRESSION) not in __JPEG_COMPRESSIONS or entries[STRIP_OFFSETS][1] != 1:
+            return None
+
+        if NEW_SUBFILE_TYPE not in entries or not value(NEW_SUBFILE_TYPE) & __REDUCED_RESOLUTION:
+            return None
+
+        start, length = base + value(STRIP_OFFSETS), value(STRIP_BYTE_COUNTS)
+    else:
+        return None
+
+    if length <= 0 or start + length > len(data) or bytes(data[start:start + 2]) != b"\xff\xd8":
+        return None
+
+    return start, length
+
+
+def jpeg_ranges(data: bytes | memoryview, base: int = 0) -> list[tuple[int, int]]:
+    order = byte_order(data, base)
+
+    ifd0_offset = __first_ifd_offset(data, order, base)
+
+    ranges = []
+    visited = set()
+    pending = [ifd0_offset]
+
+    # previews hang off the ifd chain (thumbnail in ifd1) and off SubIFDs (raw previews)
+    while pending:
+        offset = pending.pop()
+
+        if offset == 0 or offset in visited:
+            continue
+
+        visited.add(offset)
+
+        try:
+            entries, next_offset = read_ifd(data, offset, order, base)
+
+            pending.append(next_offset)
+
+            if SUB_IFDS in entries:
+                sub_ifds = decode(data, order, *entries[SUB_IFDS])
+
+                pending += sub_ifds if isinstance(sub_ifds, tuple) else [sub_ifds]
+
+            jpeg_range = __jpeg_range(data, entries, order, base)
+        except (TiffError, struct.error):
+            continue
+
+        if jpeg_range is not None:
+            ranges.append(jpeg_range)
+
+    return ranges
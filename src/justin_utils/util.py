@@ -1,11 +1,14 @@
 import glob
+import heapq
+import pickle
 import random
+import tempfile
 from collections import defaultdict
 from collections.abc import Callable, Iterable, Iterator, Sequence
 from datetime import date, datetime, time
 from pathlib import Path
 from time import process_time
-from typing import Any, TypeVar
+from typing import IO, Any, TypeVar
 
 T = TypeVar("T")
 V = TypeVar("V")
@@ -276,6 +279,38 @@ def first(seq: Iterable[T], key: Callable[[T], Any] = lambda x: x, default: T |
     return default
 
 
+def __spill(chunk: list[T]) -> IO[bytes]:
+    file = tempfile.TemporaryFile()  # noqa: SIM115
+
+    for item in chunk:
+        pickle.dump(item, file)
+
+    file.seek(0)
+
+    return file
+
+
+def __unspill(file: IO[bytes]) -> Iterator[T]:
+    with file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+def external_sorted(seq: Iterable[T], key: Callable[[T], Any] = lambda x: x, chunk_size: int = 100_000) -> Iterator[T]:
+    # sorted runs of chunk_size items are spilled to temporary files and merged lazily
+    spills = []
+
+    for chunk in stride(seq, chunk_size):
+        chunk.sort(key=key)
+
+        spills.append(__spill(chunk))
+
+    yield from heapq.merge(*(__unspill(file) for file in spills), key=key)
+
+
 def bfs(start: T, provider: Callable[[T], Iterable[T]]) -> None:
     roots = [start]
 
@@ -0,0 +1,160 @@
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from xml.etree import ElementTree
+
+NAMESPACES = {
+    "x": "adobe:ns:meta/",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "xmp": "http://ns.adobe.com/xap/1.0/",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "lr": "http://ns.adobe.com/lightroom/1.0/",
+    "photoshop": "http://ns.adobe.com/photoshop/1.0/",
+}
+
+DEFAULT_FIELDS = {
+    "rating": "xmp:Rating",
+    "label": "xmp:Label",
+    "keywords": "dc:subject",
+    "hierarchical_keywords": "lr:hierarchicalSubject",
+}
+
+Value = str | list[str]
+
+__RDF_DESCRIPTION = f"{{{NAMESPACES['rdf']}}}Description"
+__RDF_LI = f"{{{NAMESPACES['rdf']}}}li"
+
+
+def qualify(name: str) -> str:
+    prefix, local_name = name.split(":", maxsplit=1)
+
+    return f"{{{NAMESPACES[prefix]}}}{local_name}"
+
+
+class XmpMetadata:
+    def __init__(self, values: Mapping[str, Value]) -> None:
+        super().__init__()
+
+        # parsed metadata is cached and shared between callers, so it is stored read-only
+        self.values: Mapping[str, str | tuple[str, ...]] = MappingProxyType({
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in values.items()
+        })
+
+    def __getitem__(self, key: str) -> Value | None:
+        value = self.values.get(key)
+
+        if isinstance(value, tuple):
+            return list(value)
+
+        return value
+
+    def __single(self, key: str) -> str | None:
+        value = self.values.get(key)
+
+        if isinstance(value, tuple):
+            return value[0] if value else None
+
+        return value
+
+    def __multiple(self, key: str) -> list[str]:
+        value = self.values.get(key)
+
+        if value is None:
+            return []
+        elif isinstance(value, tuple):
+            return list(value)
+        else:
+            return [value]
+
+    @property
+    def rating(self) -> int | None:
+        rating = self.__single("rating")
+
+        if rating is None:
+            return None
+
+        # some tools write ratings as "4.0", an unparsable one counts as missing
+        try:
+            return int(float(rating))
+        except (ValueError, OverflowError):
+            return None
+
+    @property
+    def label(self) -> str | None:
+        return self.__single("label")
+
+    @property
+    def keywords(self) -> list[str]:
+        return self.__multiple("keywords")
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, XmpMetadata) and other.values == self.values
+
+    def __repr__(self) -> str:
+        return f"XmpMetadata({dict(self.values)})"
+
+
+def __read(path: Path, fields: tuple[tuple[str, str], ...]) -> dict[str, Value]:
+    names = {qualify(tag): name for name, tag in fields}
+    values: dict[str, Value] = {}
+
+    current: str | None = None
+    items: list[str] = []
+
+    for event, element in ElementTree.iterparse(path, events=("start", "end")):
+        if event == "start":
+            # simple properties are usually stored as attributes of rdf:Description
+            if element.tag == __RDF_DESCRIPTION:
+                for attribute, value in element.attrib.items():
+                    if attribute in names:
+                        values[names[attribute]] = value
+            elif element.tag in names:
+                current = element.tag
+                items = []
+
+            continue
+
+        if element.tag == __RDF_LI and current is not None:
+            items.append((element.text or "").strip())
+        elif current is not None and element.tag == current:
+            if items:
+                values[names[current]] = items
+            else:
+                values[names[current]] = (element.text or "").strip()
+
+            current = None
+
+        # finished elements are dropped so that memory stays flat on large sidecars
+        if current is None:
+            element.clear()
+
+    return values
+
+
+@lru_cache(maxsize=4096)
+def __read_cached(path: Path, mtime_ns: int, fields: tuple[tuple[str, str], ...]) -> XmpMetadata:
+    return XmpMetadata(__read(path, fields))
+
+
+def parse_xmp(path: Path, fields: Mapping[str, str] = DEFAULT_FIELDS) -> XmpMetadata:
+    mtime_ns = path.stat().st_mtime_ns
+
+    return __read_cached(path.absolute(), mtime_ns, tuple(sorted(fields.items())))
+
+
+def parse_xmp_batch(
+        paths: Iterable[Path],
+        fields: Mapping[str, str] = DEFAULT_FIELDS,
+        workers: int | None = None
+) -> list[XmpMetadata | None]:
+    def parse(path: Path) -> XmpMetadata | None:
+        try:
+            return parse_xmp(path, fields)
+        except (OSError, ElementTree.ParseError):
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse, paths))
@@ -1,3 +1,4 @@
+import struct
 from collections.abc import Callable
 from pathlib import Path
 
@@ -27,3 +28,43 @@ def create_files() -> Callable[[Path, FileTree], None]:
                 _create(new_path, value)
 
     return _create
+
+
+def _box(box_type: str, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type.encode()) + payload
+
+
+def _full_box(box_type: str, version: int, payload: bytes) -> bytes:
+    return _box(box_type, bytes([version, 0, 0, 0]) + payload)
+
+
+@pytest.fixture
+def heic_data() -> Callable[..., bytes]:
+    return _heic
+
+
+def _heic(exif_payload: bytes, *, item_type: bytes = b"Exif", iloc_version: int = 1) -> bytes:
+    infe = _full_box("infe", 2, struct.pack(">HH", 1, 0) + b"hvc1" + b"\x00") \
+        + _full_box("infe", 2, struct.pack(">HH", 2, 0) + item_type + b"\x00")
+    iinf = _full_box("iinf", 0, struct.pack(">H", 2) + infe)
+
+    def iloc(exif_offset: int) -> bytes:
+        items = b""
+
+        for item_id, offset in ((1, 0), (2, exif_offset)):
+            items += struct.pack(">H", item_id)
+
+            if iloc_version == 1:
+                items += struct.pack(">H", 0)
+
+            items += struct.pack(">HHII", 0, 1, offset, len(exif_payload))
+
+        return _full_box("iloc", iloc_version, bytes([0x44, 0x00]) + struct.pack(">H", 2) + items)
+
+    ftyp = _box("ftyp", b"heic\x00\x00\x00\x00mif1heic")
+    meta_size = len(_full_box("meta", 0, iinf + iloc(0)))
+
+    exif_offset = len(ftyp) + meta_size + 8
+    meta = _full_box("meta", 0, iinf + iloc(exif_offset))
+
+    return ftyp + meta + _box("mdat", exif_payload)
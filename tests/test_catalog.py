@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+from PIL import Image
+
+from justin_utils.catalog import Query, SourceCatalog
+from justin_utils.filesystem import File
+from justin_utils.sources import parse_sources
+
+_XMP = """<x:xmpmeta xmlns:x="adobe:ns:meta/">
+  <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+    <rdf:Description xmlns:xmp="http://ns.adobe.com/xap/1.0/" xmp:Rating="{rating}" xmp:Label="Red"/>
+  </rdf:RDF>
+</x:xmpmeta>"""
+
+
+def _save_jpeg(path, date_str: str, model: str) -> None:
+    exif = Image.Exif()
+    exif[0x0110] = model
+    exif.get_ifd(0x8769)[0x9003] = date_str
+
+    Image.new("RGB", (8, 8)).save(path, exif=exif)
+
+
+def _sources(folder):
+    return parse_sources(File(path) for path in sorted(folder.iterdir()))
+
+
+@pytest.fixture
+def shoot(temp_dir):
+    folder = temp_dir / "shoot"
+    folder.mkdir()
+
+    _save_jpeg(folder / "a.jpg", "2024:05:01 10:00:00", "Z 6_2")
+    _save_jpeg(folder / "b.jpg", "2024:05:02 10:00:00", "X-T5")
+    _save_jpeg(folder / "c.jpg", "2024:05:03 10:00:00", "Z 6_2")
+    (folder / "d.nef").write_bytes(b"")
+    (folder / "d.xmp").write_text(_XMP.format(rating=4))
+
+    return folder
+
+
+class TestSourceCatalog:
+    def test_range_and_equality_queries(self, shoot):
+        catalog = SourceCatalog(workers=2)
+
+        assert catalog.ingest(_sources(shoot)) == 4
+
+        in_may = Query(since=datetime(2024, 5, 2), until=datetime(2024, 5, 4))  # noqa: DTZ001
+
+        assert [source.name for source in catalog.select(in_may)] == ["b", "c"]
+        assert [source.name for source in catalog.select(Query(camera="Z 6_2"))] == ["a", "c"]
+        assert [source.name for source in catalog.select(Query(extension=".NEF"))] == ["d"]
+        assert len(catalog.select(Query(min_rating=4))[0].files()) == 2
+        assert catalog.count(Query(folder=shoot)) == len(catalog) == 4
+
+    def test_group_count(self, shoot):
+        catalog = SourceCatalog()
+        catalog.ingest(_sources(shoot))
+
+        assert catalog.group_count("camera") == {None: 1, "X-T5": 1, "Z 6_2": 2}
+        assert catalog.group_count("day", Query(camera="Z 6_2")) == {"2024-05-01": 1, "2024-05-03": 1}
+
+        with pytest.raises(KeyError):
+            catalog.group_count("path; DROP TABLE sources")
+
+    def test_ingest_is_incremental_and_persistent(self, shoot, temp_dir):
+        with SourceCatalog(temp_dir / "catalog.db") as catalog:
+            catalog.ingest(_sources(shoot))
+
+        (shoot / "d.xmp").write_text(_XMP.format(rating=1))
+        (shoot / "a.jpg").unlink()
+
+        with SourceCatalog(temp_dir / "catalog.db") as catalog:
+            assert catalog.ingest(_sources(shoot)) == 1
+            assert catalog.count(Query(min_rating=4)) == 0
+            assert catalog.prune() == 1
+            assert len(catalog) == 3
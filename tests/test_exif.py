@@ -1,15 +1,53 @@
-from datetime import datetime
-from unittest.mock import MagicMock
+import io
+import os
+import pickle
+import struct
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock, patch
 
 import pytest
+from PIL import Image
 
-from justin_utils.exif import NativeExif, PillowExif
+from justin_utils import tiff
+from justin_utils.exif import (
+    UNDATED,
+    ExifCache,
+    HeaderExif,
+    NativeExif,
+    PillowExif,
+    StoredExif,
+    capture_timestamps,
+    exif_sorted,
+    parse_exif,
+    parse_exif_batch,
+    parse_exif_date,
+    parse_utc_offset,
+    read_preview,
+    read_previews,
+)
+from justin_utils.filesystem import FileMappings
 
 # DateTimeOriginal = 36867, DateTime = 306 (PIL ExifTags)
 _DATE_STR = "2024:03:15 10:30:00"
 _EXPECTED_DT = datetime(2024, 3, 15, 10, 30, 0)  # noqa: DTZ001
 
 
+def _save_jpeg(path, date_str: str) -> None:
+    exif = Image.Exif()
+    exif.get_ifd(0x8769)[36867] = date_str
+
+    Image.new("RGB", (8, 8)).save(path, exif=exif)
+
+
+@pytest.fixture
+def jpeg(temp_dir):
+    path = temp_dir / "photo.jpg"
+
+    _save_jpeg(path, _DATE_STR)
+
+    return path
+
+
 class TestPillowExif:
     @pytest.mark.parametrize("source", [
         {36867: _DATE_STR},
@@ -68,3 +106,436 @@ class TestNativeExif:
         result2 = exif.date_taken
 
         assert result1 is result2
+
+
+def _ascii(value: str) -> tiff.RawEntry:
+    raw = value.encode() + b"\x00"
+
+    return tiff.ASCII, len(raw), raw
+
+
+class TestHeaderExif:
+    def test_jpeg_date_is_read_from_header(self, jpeg):
+        with patch.object(NativeExif, "from_path") as mock_from_path:
+            exif = parse_exif(jpeg)
+
+            mock_from_path.assert_not_called()
+
+        assert isinstance(exif, HeaderExif)
+        assert exif.date_taken == _EXPECTED_DT
+
+    def test_fields(self, temp_dir):
+        path = temp_dir / "photo.jpg"
+
+        exif = Image.Exif()
+        exif[0x010F] = "NIKON CORPORATION"
+        exif[0x0110] = "NIKON Z 6"
+        exif[0x0112] = 6
+        exif.get_ifd(0x8769)[36867] = _DATE_STR
+        exif.get_ifd(0x8769)[0xA434] = "NIKKOR Z 50mm f/1.8 S"
+
+        Image.new("RGB", (8, 8)).save(path, exif=exif)
+
+        result = HeaderExif.from_path(path)
+
+        assert result.date_taken == _EXPECTED_DT
+        assert result.orientation == 6
+        assert result.camera == "NIKON CORPORATION NIKON Z 6"
+        assert result.lens == "NIKKOR Z 50mm f/1.8 S"
+
+    @pytest.mark.parametrize("sub_second, microsecond", [
+        ("5", 500000),
+        ("123", 123000),
+        ("1234567", 123456),
+        ("", 0),
+    ])
+    def test_capture_time_includes_sub_seconds(self, sub_second, microsecond):
+        exif = HeaderExif("<", {0x9003: _ascii(_DATE_STR), 0x9291: _ascii(sub_second)})
+
+        assert exif.capture_time == _EXPECTED_DT.replace(microsecond=microsecond)
+
+    def test_values_are_decoded_on_access(self, jpeg):
+        with patch.object(tiff, "decode", wraps=tiff.decode) as mock_decode:
+            exif = HeaderExif.from_path(jpeg)
+            decoded = mock_decode.call_count
+
+            assert exif.lens is None
+            assert mock_decode.call_count == decoded
+
+            assert exif.date_taken == _EXPECTED_DT
+            assert mock_decode.call_count == decoded + 1
+
+    def test_parsing_does_not_keep_file_mapped(self, jpeg):
+        FileMappings.instance().clear()
+
+        assert parse_exif(jpeg).date_taken == _EXPECTED_DT
+        assert HeaderExif.from_path(jpeg).date_taken == _EXPECTED_DT
+        assert len(FileMappings.instance()) == 0
+
+    @pytest.mark.parametrize("garbage", ["0000:00:00 00:00:00", "    :  :     :  :  "])
+    def test_malformed_date_falls_back_to_next_tag(self, garbage):
+        exif = HeaderExif("<", {0x9003: _ascii(garbage), 0x0132: _ascii(_DATE_STR)})
+
+        assert exif.date_taken == _EXPECTED_DT
+
+    @pytest.mark.parametrize("garbage", ["0000:00:00 00:00:00", "    :  :     :  :  "])
+    def test_malformed_date_only_is_undated(self, temp_dir, garbage):
+        path = temp_dir / "photo.tif"
+
+        exif = Image.Exif()
+        exif[0x0132] = garbage
+
+        Image.new("RGB", (8, 8)).save(path, format="TIFF", exif=exif)
+
+        assert HeaderExif.from_data(path.read_bytes()) is None
+
+    def test_date_is_decoded_once(self, jpeg):
+        exif = HeaderExif.from_path(jpeg)
+
+        with patch.object(tiff, "decode", wraps=tiff.decode) as mock_decode:
+            assert exif.date_taken == _EXPECTED_DT
+            assert exif.date_taken == _EXPECTED_DT
+
+            assert mock_decode.call_count == 1
+
+    def test_is_slotted_and_picklable(self, jpeg):
+        exif = HeaderExif.from_path(jpeg)
+
+        assert not hasattr(exif, "__dict__")
+        assert pickle.loads(pickle.dumps(exif)).date_taken == _EXPECTED_DT
+
+    def test_field_table_falls_back_through_tags(self):
+        exif = HeaderExif("<", {0x9003: _ascii(""), 0x0132: _ascii(_DATE_STR)})
+
+        assert exif.field("date_taken") == _EXPECTED_DT
+        assert exif.field("date_original") is None
+        assert exif.capture_time == _EXPECTED_DT
+
+    @pytest.mark.parametrize("extension", [".tif", ".arw"])
+    def test_tiff_based_raw(self, temp_dir, extension):
+        path = temp_dir / f"photo{extension}"
+
+        exif = Image.Exif()
+        exif[0x0132] = _DATE_STR
+
+        Image.new("RGB", (8, 8)).save(path, format="TIFF", exif=exif)
+
+        assert isinstance(parse_exif(path), HeaderExif)
+        assert parse_exif(path).date_taken == _EXPECTED_DT
+
+    def test_raf_reads_embedded_jpeg(self, temp_dir, jpeg):
+        path = temp_dir / "photo.raf"
+        jpeg_data = jpeg.read_bytes()
+        header = b"FUJIFILMCCD-RAW 0201FF383501".ljust(84, b"\x00")
+        header += struct.pack(">II", 100, len(jpeg_data))
+
+        path.write_bytes(header.ljust(100, b"\x00") + jpeg_data)
+
+        assert parse_exif(path).date_taken == _EXPECTED_DT
+
+    def test_heic_reads_exif_item(self, temp_dir, jpeg, heic_data):
+        path = temp_dir / "photo.heic"
+        jpeg_data = jpeg.read_bytes()
+        tiff_offset = HeaderExif.jpeg_tiff_offset(jpeg_data)
+
+        path.write_bytes(heic_data(struct.pack(">I", 6) + b"Exif\x00\x00" + jpeg_data[tiff_offset:]))
+
+        assert parse_exif(path).date_taken == _EXPECTED_DT
+
+    @pytest.mark.parametrize("extension", [".raf", ".heic"])
+    def test_unreadable_header_without_fallback(self, temp_dir, extension):
+        path = temp_dir / f"photo{extension}"
+        path.write_bytes(b"garbage")
+
+        assert parse_exif(path) is None
+
+    @pytest.mark.parametrize("name, data, fallback", [
+        ("photo.nef", b"II*\x00\x08\x00", PillowExif),
+        ("photo.jpg", b"\xff\xd8\xff\xe1\x00\x0cExif\x00\x00II*\x00\xff\xd9", NativeExif),
+    ])
+    def test_truncated_header_falls_back(self, temp_dir, name, data, fallback):
+        path = temp_dir / name
+        path.write_bytes(data)
+
+        with patch.object(fallback, "from_path") as mock_from_path:
+            parse_exif(path)
+
+            mock_from_path.assert_called_once_with(path)
+
+    def test_falls_back_without_exif_segment(self, temp_dir):
+        path = temp_dir / "photo.jpg"
+        Image.new("RGB", (8, 8)).save(path)
+
+        with patch.object(NativeExif, "from_path") as mock_from_path:
+            parse_exif(path)
+
+            mock_from_path.assert_called_once_with(path)
+
+
+class TestParseExifContract:
+    @pytest.mark.parametrize("name", ["plain.jpg", "plain.tif"])
+    @pytest.mark.parametrize("cached", [False, True])
+    def test_undated_file_is_none(self, temp_dir, name, cached):
+        path = temp_dir / name
+        Image.new("RGB", (8, 8)).save(path)
+
+        with ExifCache(temp_dir / "cache.sqlite") as cache:
+            assert parse_exif(path, cache if cached else None) is None
+
+    @pytest.mark.parametrize("cached", [False, True])
+    def test_dated_file_has_date(self, temp_dir, jpeg, cached):
+        with ExifCache(temp_dir / "cache.sqlite") as cache:
+            assert parse_exif(jpeg, cache if cached else None).date_taken == _EXPECTED_DT
+
+
+class TestExifCache:
+    def test_second_parse_does_not_open_file(self, temp_dir, jpeg):
+        with ExifCache(temp_dir / "cache.sqlite") as cache:
+            assert parse_exif(jpeg, cache).date_taken == _EXPECTED_DT
+
+        with ExifCache(temp_dir / "cache.sqlite") as cache, patch.object(NativeExif, "from_path") as mock_from_path:
+            assert parse_exif(jpeg, cache).date_taken == _EXPECTED_DT
+
+            mock_from_path.assert_not_called()
+
+    def test_changed_file_is_reparsed(self, temp_dir, jpeg):
+        with ExifCache(temp_dir / "cache.sqlite") as cache:
+            parse_exif(jpeg, cache)
+
+            os.utime(jpeg, (0, 0))
+
+            with patch.object(HeaderExif, "from_data", wraps=HeaderExif.from_data) as mock_from_data:
+                parse_exif(jpeg, cache)
+
+                mock_from_data.assert_called_once()
+
+    def test_prefetch_serves_from_memory(self, temp_dir, jpeg):
+        with ExifCache(temp_dir / "cache.sqlite") as cache:
+            parse_exif(jpeg, cache)
+
+        with ExifCache(temp_dir / "cache.sqlite") as cache:
+            cache.prefetch([jpeg, temp_dir / "missing.jpg"])
+
+            assert cache.get(jpeg).date_taken == _EXPECTED_DT
+
+    def test_compact_drops_stale_entries(self, temp_dir, jpeg):
+        with ExifCache(temp_dir / "cache.sqlite") as cache:
+            parse_exif(jpeg, cache)
+            jpeg.unlink()
+
+            assert cache.compact() == 1
+
+
+class TestParseExifBatch:
+    @pytest.fixture
+    def paths(self, temp_dir, jpeg):
+        broken = temp_dir / "broken.nef"
+        broken.write_bytes(b"not an image")
+
+        return [jpeg, temp_dir / "notes.txt", broken]
+
+    @pytest.mark.parametrize("use_processes", [False, True])
+    def test_results_keep_input_order(self, paths, use_processes):
+        results = list(parse_exif_batch(paths, workers=2, use_processes=use_processes))
+
+        assert [result.path for result in results] == paths
+        assert results[0].exif.date_taken == _EXPECTED_DT
+        assert results[1].exif is None
+        assert results[1].error is None
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_input_is_consumed_in_windows(self, temp_dir, ordered):
+        pulled = []
+
+        def paths():
+            for index in range(2000):
+                pulled.append(index)
+
+                yield temp_dir / f"{index}.txt"
+
+        results = parse_exif_batch(paths(), workers=1, ordered=ordered)
+        next(results)
+
+        assert len(pulled) <= 500
+
+        assert len(list(results)) == 1999
+
+    def test_errors_are_isolated(self, paths):
+        results = list(parse_exif_batch(paths))
+
+        assert results[2].exif is None
+        assert results[2].error is not None
+
+    def test_unordered_returns_every_path(self, paths):
+        results = parse_exif_batch(paths, ordered=False)
+
+        assert {result.path for result in results} == set(paths)
+
+    @pytest.mark.parametrize("use_processes", [False, True])
+    def test_results_are_cached(self, temp_dir, paths, use_processes):
+        with ExifCache(temp_dir / "cache.sqlite") as cache:
+            list(parse_exif_batch(paths, cache=cache, use_processes=use_processes))
+
+            assert cache.get(paths[0]).date_taken == _EXPECTED_DT
+
+    @pytest.mark.parametrize("use_processes", [False, True])
+    def test_undated_files_are_cached(self, temp_dir, use_processes):
+        path = temp_dir / "undated.jpg"
+        Image.new("RGB", (8, 8)).save(path)
+
+        with ExifCache(temp_dir / "cache.sqlite") as cache:
+            [result] = parse_exif_batch([path], cache=cache, use_processes=use_processes)
+
+            assert result.exif is None
+            assert cache.get(path) is not None
+
+
+class TestExifSorted:
+    @pytest.fixture
+    def paths(self, temp_dir):
+        dated = {
+            "a.jpg": "2024:03:15 12:00:00",
+            "b.jpg": "2024:03:15 10:00:00",
+            "c.jpg": "2024:03:15 10:00:00",
+        }
+
+        for name, date_str in dated.items():
+            _save_jpeg(temp_dir / name, date_str)
+
+        for name in ["0.txt", "z.jpg"]:
+            (temp_dir / name).write_bytes(b"no exif")
+
+        return [temp_dir / name for name in ["z.jpg", "a.jpg", "0.txt", "c.jpg", "b.jpg"]]
+
+    @pytest.mark.parametrize("chunk_size", [None, 1, 2, 100])
+    def test_dated_by_date_then_undated_by_name(self, paths, chunk_size):
+        result = exif_sorted(paths, workers=2, chunk_size=chunk_size)
+
+        assert [path.name for path in result] == ["b.jpg", "c.jpg", "a.jpg", "0.txt", "z.jpg"]
+
+    @pytest.mark.parametrize("chunk_size", [None, 2])
+    def test_parse_errors_are_reported(self, temp_dir, paths, chunk_size, capsys):
+        broken = temp_dir / "broken.nef"
+        broken.write_bytes(b"not an image")
+        paths.append(broken)
+        errors = []
+
+        result = list(exif_sorted(paths, chunk_size=chunk_size, on_error=lambda path, e: errors.append(path.name)))
+
+        assert [path.name for path in result][-3:] == ["0.txt", "broken.nef", "z.jpg"]
+        assert errors == ["broken.nef"]
+
+        list(exif_sorted(paths, chunk_size=chunk_size))
+
+        assert "Failed to read exif of 1 files" in capsys.readouterr().out
+
+
+def _jpeg_bytes(size: tuple[int, int]) -> bytes:
+    buffer = io.BytesIO()
+
+    Image.new("RGB", size, "red").save(buffer, "JPEG")
+
+    return buffer.getvalue()
+
+
+def _with_thumbnail(jpeg: bytes, thumbnail: bytes) -> bytes:
+    # ifd0 is empty and links to ifd1, which holds the thumbnail right after itself
+    ifd1_offset = 8 + 2 + 4
+    thumbnail_offset = ifd1_offset + 2 + 2 * 12 + 4
+
+    tiff_data = b"II*\x00" + struct.pack("<I", 8) + struct.pack("<HI", 0, ifd1_offset)
+    tiff_data += struct.pack("<H", 2)
+    tiff_data += struct.pack("<HHII", tiff.JPEG_OFFSET, tiff.LONG, 1, thumbnail_offset)
+    tiff_data += struct.pack("<HHII", tiff.JPEG_LENGTH, tiff.LONG, 1, len(thumbnail))
+    tiff_data += struct.pack("<I", 0) + thumbnail
+
+    app1 = b"Exif\x00\x00" + tiff_data
+
+    return jpeg[:2] + b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + jpeg[2:]
+
+
+class TestPreviews:
+    def test_jpeg_thumbnail_and_full_image(self, temp_dir):
+        thumbnail = _jpeg_bytes((4, 4))
+        path = temp_dir / "photo.jpg"
+        path.write_bytes(_with_thumbnail(_jpeg_bytes((64, 64)), thumbnail))
+
+        with read_preview(path, largest=False) as preview:
+            assert bytes(preview) == thumbnail
+
+        with read_preview(path) as preview:
+            assert bytes(preview) == path.read_bytes()
+
+    def test_raf_embedded_jpeg(self, temp_dir):
+        jpeg = _jpeg_bytes((16, 16))
+        header = b"FUJIFILMCCD-RAW ".ljust(84, b"\x00") + struct.pack(">II", 100, len(jpeg))
+        path = temp_dir / "photo.raf"
+        path.write_bytes(header.ljust(100, b"\x00") + jpeg)
+
+        with read_preview(path) as preview:
+            assert bytes(preview) == jpeg
+
+    def test_unsupported_or_empty_files_have_no_preview(self, temp_dir):
+        (temp_dir / "notes.txt").write_text("text")
+        (temp_dir / "empty.nef").write_bytes(b"")
+
+        assert read_preview(temp_dir / "notes.txt") is None
+        assert read_preview(temp_dir / "empty.nef") is None
+
+    def test_truncated_header_has_no_embedded_preview(self, temp_dir):
+        path = temp_dir / "photo.nef"
+        path.write_bytes(b"II*\x00\x08\x00")
+
+        assert read_preview(path) is None
+
+    def test_batch_keeps_order_past_window(self, temp_dir):
+        paths = []
+
+        for index in range(10):
+            path = temp_dir / f"{index}.jpg"
+            path.write_bytes(_jpeg_bytes((8 + index, 8)))
+            paths.append(path)
+
+        results = list(read_previews(paths, workers=1))
+
+        assert [path for path, _ in results] == paths
+        assert all(bytes(preview) == path.read_bytes() for path, preview in results)
+
+
+class TestCaptureTimestamps:
+    @pytest.mark.parametrize("value", ["2023:06:15 14:30:00", "2000:01:01 00:00:59"])
+    def test_fixed_format_parser_matches_strptime(self, value):
+        assert parse_exif_date(value) == datetime.strptime(value, "%Y:%m:%d %H:%M:%S")  # noqa: DTZ007
+
+    @pytest.mark.parametrize("value", ["2023-06-15 14:30:00", "2023:06:15", "    :  :     :  :  "])
+    def test_fixed_format_parser_rejects_other_formats(self, value):
+        with pytest.raises(ValueError):
+            parse_exif_date(value)
+
+    @pytest.mark.parametrize("value, expected", [
+        ("+02:00", timedelta(hours=2)),
+        ("-05:30", -timedelta(hours=5, minutes=30)),
+        ("+00:00", timedelta(0)),
+    ])
+    def test_utc_offset(self, value, expected):
+        assert parse_utc_offset(value) == expected
+
+    def test_offset_time_original_is_read(self):
+        exif = HeaderExif("<", {0x9003: _ascii(_DATE_STR), 0x9011: _ascii("+03:00")})
+
+        assert exif.utc_offset == timedelta(hours=3)
+        assert StoredExif.from_exif(exif).utc_offset == timedelta(hours=3)
+
+    def test_epoch_microseconds_in_utc(self):
+        exifs = [
+            HeaderExif("<", {0x9003: _ascii(_DATE_STR), 0x9011: _ascii("+02:00")}),
+            HeaderExif("<", {0x9003: _ascii(_DATE_STR), 0x9011: _ascii("+00:00")}),
+            HeaderExif("<", {0x9003: _ascii(_DATE_STR)}),
+            None,
+        ]
+
+        timestamps = capture_timestamps(exifs, default_offset=timedelta(hours=1))
+
+        utc = _EXPECTED_DT.replace(tzinfo=UTC).timestamp() * 1_000_000
+
+        assert list(timestamps) == [utc - 2 * 3_600_000_000, utc, utc - 3_600_000_000, UNDATED]
@@ -1,8 +1,21 @@
+import errno
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
 
-from justin_utils.filesystem import Folder
+from justin_utils import filesystem
+from justin_utils.filesystem import (
+    Durability,
+    DurabilityPolicy,
+    File,
+    FileMappings,
+    Folder,
+    TransferVerificationError,
+)
+from justin_utils.scan_rules import ExtensionRule, ScanRules
 
 FileTree = dict[str, "FileTree | str | None"]
 
@@ -66,3 +79,400 @@ class TestMergeInto:
         source.merge_into(target)
 
         assert source.path == target
+
+
+class TestScanRules:
+    def test_default_rules_unlink_junk_and_skip_meta(self, temp_dir, create_files):
+        create_files(temp_dir, {".DS_Store": None, "_meta.json": "{}", "a.jpg": None})
+
+        folder = Folder(temp_dir)
+
+        assert [file.name for file in folder.files] == ["a.jpg"]
+        assert not (temp_dir / ".DS_Store").exists()
+        assert (temp_dir / "_meta.json").exists()
+
+    def test_excluded_subtree_is_not_descended(self, temp_dir, create_files, monkeypatch):
+        create_files(temp_dir, {"cache": {"deep": {"a.jpg": None}}, "shoot": {"a.jpg": None, "a.tmp": None}})
+        scanned = []
+        scandir = os.scandir
+
+        def spy(path):
+            scanned.append(Path(path).name)
+
+            return scandir(path)
+
+        monkeypatch.setattr(filesystem.os, "scandir", spy)
+
+        folder = Folder(temp_dir, ScanRules.from_patterns(["/cache/", "*.tmp"]))
+
+        assert [file.name for file in folder.flatten()] == ["a.jpg"]
+        assert "cache" not in folder
+        assert "cache" not in scanned
+        assert "deep" not in scanned
+
+    def test_folder_hidden_by_include_rules_is_kept(self, temp_dir, create_files, capsys):
+        create_files(temp_dir, {"notes": {"a.txt": "a"}, "empty": {}, "a.jpg": None})
+
+        folder = Folder(temp_dir, ScanRules(include=[ExtensionRule([".jpg"])]))
+
+        assert [file.name for file in folder.flatten()] == ["a.jpg"]
+        assert (temp_dir / "notes" / "a.txt").exists()
+        assert not (temp_dir / "empty").exists()
+        assert "Failed to remove" not in capsys.readouterr().out
+
+    def test_anchored_pattern_applies_below_root(self, temp_dir, create_files):
+        create_files(temp_dir, {"shoot": {"previews": {"a.jpg": None}, "a.nef": None}})
+
+        folder = Folder(temp_dir, ScanRules.from_patterns(["shoot/previews/"]))
+        shoot = folder / "shoot"
+
+        assert [file.name for file in folder.flatten()] == ["a.nef"]
+        assert "previews" not in shoot
+
+
+class TestDeferredMove:
+    @pytest.fixture
+    def cross_device(self, monkeypatch):
+        monkeypatch.setattr(filesystem, "__get_mount", lambda path: path)
+
+    @pytest.fixture
+    def sync_snapshots(self, monkeypatch):
+        snapshots = []
+
+        def record(path, written):
+            written = list(written)
+
+            snapshots.append((path, written, [p.exists() for p in written]))
+
+        monkeypatch.setattr(filesystem, "__sync_filesystem", record)
+
+        return snapshots
+
+    def test_tree_is_copied_before_sources_are_removed(self, temp_dir, create_files, cross_device, sync_snapshots):
+        create_files(temp_dir, {"src": {"shoot": {"a.nef": "a", "sub": {"b.xmp": "b"}}}, "dst": {}})
+        source = temp_dir / "src" / "shoot"
+
+        filesystem.move(source, temp_dir / "dst", deferred_removal=True)
+
+        assert len(sync_snapshots) == 1
+        assert all(sync_snapshots[0][2])
+        assert (temp_dir / "dst" / "shoot" / "a.nef").read_text() == "a"
+        assert (temp_dir / "dst" / "shoot" / "sub" / "b.xmp").read_text() == "b"
+        assert not source.exists()
+
+    def test_single_file_is_synced_once(self, temp_dir, create_files, cross_device, sync_snapshots):
+        create_files(temp_dir, {"src": {"a.nef": "a"}, "dst": {}})
+
+        filesystem.move(temp_dir / "src" / "a.nef", temp_dir / "dst", deferred_removal=True)
+
+        assert len(sync_snapshots) == 1
+        assert (temp_dir / "dst" / "a.nef").exists()
+        assert not (temp_dir / "src" / "a.nef").exists()
+
+    def test_size_mismatch_keeps_sources(self, temp_dir, create_files, cross_device, monkeypatch):
+        create_files(temp_dir, {"src": {"shoot": {"a.nef": "a"}}, "dst": {}})
+
+        def truncate(path, written):
+            for written_path in written:
+                written_path.write_text("")
+
+        monkeypatch.setattr(filesystem, "__sync_filesystem", truncate)
+
+        with pytest.raises(TransferVerificationError):
+            filesystem.move(temp_dir / "src" / "shoot", temp_dir / "dst", deferred_removal=True)
+
+        assert (temp_dir / "src" / "shoot" / "a.nef").exists()
+
+
+_SHOOT: FileTree = {"shoot": {"a": "a", "b": "b", "c": "c", "sub": {"d": "d", "e": "e"}}}
+
+
+class TestDurability:
+    @pytest.fixture
+    def syncs(self, monkeypatch):
+        calls = []
+
+        monkeypatch.setattr(filesystem, "__sync_filesystem", lambda path, written: calls.append(list(written)))
+        monkeypatch.setattr(filesystem, "__fsync_path", lambda path: calls.append([path]))
+
+        return calls
+
+    @pytest.mark.parametrize("policy, expected_batches", [
+        (DurabilityPolicy(), []),
+        (DurabilityPolicy(Durability.BATCHED, batch_size=2), [2, 2, 1]),
+        (DurabilityPolicy(Durability.BATCHED), [3, 2]),
+    ])
+    def test_copy_syncs_in_batches(self, temp_dir, create_files, syncs, policy, expected_batches):
+        create_files(temp_dir, {"src": _SHOOT, "dst": {}})
+
+        filesystem.copy(temp_dir / "src" / "shoot", temp_dir / "dst", durability=policy)
+
+        assert [len(batch) for batch in syncs] == expected_batches
+        assert (temp_dir / "dst" / "shoot" / "sub" / "e").exists()
+
+    def test_per_file_syncs_file_and_directory(self, temp_dir, create_files, syncs):
+        create_files(temp_dir, {"src": {"a": "a"}, "dst": {}})
+
+        filesystem.copy(temp_dir / "src" / "a", temp_dir / "dst", durability=DurabilityPolicy(Durability.PER_FILE))
+
+        assert [path for [path] in syncs] == [(temp_dir / "dst" / "a").resolve(), (temp_dir / "dst").resolve()]
+
+    def test_batched_move_removes_sources_after_sync(self, temp_dir, create_files, syncs, monkeypatch):
+        monkeypatch.setattr(filesystem, "__get_mount", lambda path: path)
+        create_files(temp_dir, {"src": _SHOOT, "dst": {}})
+
+        filesystem.move(
+            temp_dir / "src" / "shoot",
+            temp_dir / "dst",
+            durability=DurabilityPolicy(Durability.BATCHED, batch_size=2)
+        )
+
+        assert len(syncs) == 3
+        assert not (temp_dir / "src" / "shoot").exists()
+        assert (temp_dir / "dst" / "shoot" / "sub" / "d").exists()
+
+
+class TestBulkTransfer:
+    @pytest.fixture
+    def cross_device(self, monkeypatch):
+        monkeypatch.setattr(filesystem, "__get_mount", lambda path: path)
+
+    def test_cross_device_groups_are_removed_after_batched_sync(self, temp_dir, create_files, cross_device,
+                                                                 monkeypatch):
+        syncs = []
+        monkeypatch.setattr(filesystem, "__sync_filesystem", lambda path, written: syncs.append(list(written)))
+        create_files(temp_dir, {"src": {"a.nef": "a", "a.xmp": "x", "b.jpg": "b"}, "dst": {}})
+        src, dst = temp_dir / "src", temp_dir / "dst"
+
+        errors = filesystem.move_files(
+            [[(src / "a.nef", dst / "a.nef"), (src / "a.xmp", dst / "a.xmp")], [(src / "b.jpg", dst / "b.jpg")]],
+            workers=2,
+            durability=DurabilityPolicy(Durability.BATCHED)
+        )
+
+        assert errors == [None, None]
+        assert len(syncs) == 1
+        assert sorted(p.name for p in dst.iterdir()) == ["a.nef", "a.xmp", "b.jpg"]
+        assert list(src.iterdir()) == []
+
+    @pytest.mark.parametrize("transfer", [filesystem.move_files, filesystem.copy_files])
+    def test_failed_group_is_rolled_back(self, temp_dir, create_files, cross_device, transfer):
+        create_files(temp_dir, {"src": {"a.nef": "a", "a.xmp": "x", "b.jpg": "b"}, "dst": {"a.xmp": "old"}})
+        src, dst = temp_dir / "src", temp_dir / "dst"
+
+        errors = transfer(
+            [[(src / "a.nef", dst / "a.nef"), (src / "a.xmp", dst / "a.xmp")], [(src / "b.jpg", dst / "b.jpg")]]
+        )
+
+        assert isinstance(errors[0], FileExistsError)
+        assert errors[1] is None
+        assert not (dst / "a.nef").exists()
+        assert (dst / "a.xmp").read_text() == "old"
+        assert (src / "a.nef").exists()
+        assert (dst / "b.jpg").exists()
+
+    def test_failed_removal_is_reported_per_group(self, temp_dir, create_files, cross_device, monkeypatch):
+        create_files(temp_dir, {"src": {"a.nef": "a", "b.jpg": "b"}, "dst": {}})
+        src, dst = temp_dir / "src", temp_dir / "dst"
+
+        remove_file = filesystem.__dict__["__remove_file"]
+
+        def locked(path):
+            if path.name == "a.nef":
+                raise PermissionError(path)
+
+            remove_file(path)
+
+        monkeypatch.setattr(filesystem, "__remove_file", locked)
+
+        errors = filesystem.move_files([[(src / "a.nef", dst / "a.nef")], [(src / "b.jpg", dst / "b.jpg")]])
+
+        assert isinstance(errors[0], PermissionError)
+        assert errors[1] is None
+        assert (src / "a.nef").exists()
+        assert not (src / "b.jpg").exists()
+        assert (dst / "b.jpg").exists()
+
+    def test_failed_verification_keeps_group_sources(self, temp_dir, create_files, cross_device, monkeypatch):
+        create_files(temp_dir, {"src": {"a.nef": "a", "a.xmp": "x", "b.jpg": "b"}, "dst": {}})
+        src, dst = temp_dir / "src", temp_dir / "dst"
+
+        def truncate(path, written):
+            (dst / "a.xmp").write_text("")
+
+        monkeypatch.setattr(filesystem, "__sync_filesystem", truncate)
+
+        errors = filesystem.move_files(
+            [[(src / "a.nef", dst / "a.nef"), (src / "a.xmp", dst / "a.xmp")], [(src / "b.jpg", dst / "b.jpg")]],
+            durability=DurabilityPolicy(Durability.BATCHED)
+        )
+
+        assert isinstance(errors[0], TransferVerificationError)
+        assert errors[1] is None
+        assert sorted(p.name for p in src.iterdir()) == ["a.nef", "a.xmp"]
+
+    def test_group_spanning_batches_keeps_sources_until_all_verified(self, temp_dir, create_files, cross_device,
+                                                                      monkeypatch):
+        create_files(temp_dir, {"src": {"a.nef": "a", "a.xmp": "x"}, "dst": {}})
+        src, dst = temp_dir / "src", temp_dir / "dst"
+
+        def truncate(path, written):
+            if dst / "a.xmp" in written:
+                (dst / "a.xmp").write_text("")
+
+        monkeypatch.setattr(filesystem, "__sync_filesystem", truncate)
+
+        [error] = filesystem.move_files(
+            [[(src / "a.nef", dst / "a.nef"), (src / "a.xmp", dst / "a.xmp")]],
+            durability=DurabilityPolicy(Durability.BATCHED, batch_size=1)
+        )
+
+        assert isinstance(error, TransferVerificationError)
+        assert sorted(p.name for p in src.iterdir()) == ["a.nef", "a.xmp"]
+
+    @pytest.mark.parametrize("transfer", [filesystem.move_files, filesystem.copy_files])
+    def test_shared_destination_is_rejected_before_transfer(self, temp_dir, create_files, transfer):
+        create_files(temp_dir, {"a": {"DSC_0001.NEF": "a"}, "b": {"DSC_0001.NEF": "b"}, "dst": {}})
+        dst = temp_dir / "dst"
+
+        errors = transfer([
+            [(temp_dir / "a" / "DSC_0001.NEF", dst / "DSC_0001.NEF")],
+            [(temp_dir / "b" / "DSC_0001.NEF", dst / "DSC_0001.NEF")],
+        ], workers=2)
+
+        assert errors[0] is None
+        assert isinstance(errors[1], FileExistsError)
+        assert (dst / "DSC_0001.NEF").read_text() == "a"
+        assert (temp_dir / "b" / "DSC_0001.NEF").read_text() == "b"
+
+    def test_same_device_move_without_hard_links(self, temp_dir, create_files, monkeypatch):
+        create_files(temp_dir, {"src": {"a.nef": "a", "c.nef": "c"}, "dst": {"b.nef": "b"}})
+        src, dst = temp_dir / "src", temp_dir / "dst"
+
+        def unsupported(*args):
+            raise OSError(errno.EPERM, "Operation not permitted")
+
+        monkeypatch.setattr(os, "link", unsupported)
+
+        errors = filesystem.move_files([[(src / "a.nef", dst / "a.nef")], [(src / "c.nef", dst / "b.nef")]])
+
+        assert errors[0] is None
+        assert isinstance(errors[1], FileExistsError)
+        assert (dst / "a.nef").read_text() == "a"
+        assert not (src / "a.nef").exists()
+        assert (dst / "b.nef").read_text() == "b"
+        assert (src / "c.nef").read_text() == "c"
+
+    def test_copy_onto_existing_file_raises_file_exists(self, temp_dir, create_files):
+        create_files(temp_dir, {"src": {"a.nef": "a"}, "dst": {"a.nef": "old"}})
+
+        with pytest.raises(FileExistsError):
+            filesystem.copy(temp_dir / "src" / "a.nef", temp_dir / "dst")
+
+        assert (temp_dir / "dst" / "a.nef").read_text() == "old"
+
+    def test_same_device_move_renames_back_on_failure(self, temp_dir, create_files):
+        create_files(temp_dir, {"src": {"a.nef": "a", "a.xmp": "x"}, "dst": {"a.xmp": "old"}})
+        src, dst = temp_dir / "src", temp_dir / "dst"
+
+        [error] = filesystem.move_files([[(src / "a.nef", dst / "a.nef"), (src / "a.xmp", dst / "a.xmp")]])
+
+        assert isinstance(error, FileExistsError)
+        assert (src / "a.nef").read_text() == "a"
+        assert not (dst / "a.nef").exists()
+
+
+class TestFileView:
+    @pytest.fixture(autouse=True)
+    def clean_mappings(self):
+        yield
+
+        FileMappings.instance().clear()
+
+    @pytest.mark.parametrize("start, end, expected", [
+        (0, None, b"0123456789"),
+        (2, 5, b"234"),
+        (8, None, b"89"),
+    ])
+    def test_view_returns_range(self, temp_dir, start, end, expected):
+        path = temp_dir / "file.bin"
+        path.write_bytes(b"0123456789")
+
+        with File(path).mapped(start, end) as view:
+            assert bytes(view) == expected
+
+    def test_empty_file_returns_empty_view(self, temp_dir):
+        path = temp_dir / "empty.bin"
+        path.touch()
+
+        assert bytes(File(path).view()) == b""
+
+    def test_views_share_mapping(self, temp_dir):
+        path = temp_dir / "file.bin"
+        path.write_bytes(b"content")
+
+        File(path).view()
+        File(path).view(1, 3)
+
+        assert len(FileMappings.instance()) == 1
+
+    def test_changed_file_is_remapped(self, temp_dir):
+        path = temp_dir / "file.bin"
+        path.write_bytes(b"old")
+
+        with File(path).mapped() as view:
+            assert bytes(view) == b"old"
+
+        path.write_bytes(b"new content")
+
+        with File(path).mapped() as view:
+            assert bytes(view) == b"new content"
+
+    def test_least_recently_used_is_evicted(self, temp_dir, monkeypatch):
+        monkeypatch.setattr(FileMappings, "CAPACITY", 2)
+
+        for name in ["a", "b", "c"]:
+            path = temp_dir / name
+            path.write_bytes(name.encode())
+
+            with File(path).mapped():
+                pass
+
+        assert len(FileMappings.instance()) == 2
+
+    def test_transient_mapping_is_closed_on_exit(self, temp_dir):
+        path = temp_dir / "file.bin"
+        path.write_bytes(b"0123456789")
+
+        with File(path).mapped(2, 5, transient=True) as view:
+            assert bytes(view) == b"234"
+
+        assert len(FileMappings.instance()) == 0
+
+        path.rename(temp_dir / "renamed.bin")
+
+    def test_concurrent_views_survive_eviction(self, temp_dir, monkeypatch):
+        monkeypatch.setattr(FileMappings, "CAPACITY", 1)
+
+        paths = []
+
+        for index in range(200):
+            path = temp_dir / f"{index}.bin"
+            path.write_bytes(bytes([index]) * 16)
+
+            paths.append(path)
+
+        def read(path: Path) -> bytes:
+            with File(path).mapped(0, 4) as view:
+                return bytes(view)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+        try:
+            with ThreadPoolExecutor(max_workers=32) as executor:
+                results = list(executor.map(read, paths * 5))
+        finally:
+            sys.setswitchinterval(interval)
+
+        assert results == [bytes([index]) * 4 for index in range(200)] * 5
@@ -0,0 +1,29 @@
+import struct
+
+import pytest
+
+from justin_utils import heif
+
+_TIFF = b"MM\x00*\x00\x00\x00\x08"
+
+
+class TestExifTiffOffset:
+    @pytest.mark.parametrize("iloc_version", [0, 1])
+    def test_finds_tiff_header_of_exif_item(self, heic_data, iloc_version):
+        data = heic_data(struct.pack(">I", 6) + b"Exif\x00\x00" + _TIFF, iloc_version=iloc_version)
+
+        offset = heif.exif_tiff_offset(data)
+
+        assert data[offset:offset + len(_TIFF)] == _TIFF
+
+    def test_no_exif_item(self, heic_data):
+        data = heic_data(struct.pack(">I", 6) + b"Exif\x00\x00" + _TIFF, item_type=b"mime")
+
+        assert heif.exif_tiff_offset(data) is None
+
+    def test_no_meta_box(self):
+        assert heif.exif_tiff_offset(struct.pack(">I4s", 12, b"ftyp") + b"heic") is None
+
+    def test_malformed_box_raises(self):
+        with pytest.raises(heif.HeifError):
+            heif.exif_tiff_offset(struct.pack(">I4s", 100, b"ftyp"))
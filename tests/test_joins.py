@@ -1,6 +1,21 @@
+import itertools
+import random
+
 import pytest
 
-from justin_utils.joins import inner, left, right
+from justin_utils.joins import (
+    AsofDirection,
+    JoinMode,
+    asof_join,
+    full_outer,
+    inner,
+    left,
+    merge_join,
+    multi_join,
+    right,
+    window_join,
+)
+from justin_utils.pylinq import Sequence
 
 
 def _eq(a, b) -> bool:
@@ -46,3 +61,198 @@ class TestRight:
         result = list(right(seq1, seq2, _eq))
 
         assert expected_pair in result
+
+
+_FILES = [{"name": "a.nef"}, {"name": "b.nef"}, {"name": "c.nef"}]
+_SIDECARS = [{"name": "a.xmp"}, {"name": "c.xmp"}, {"name": "c.XMP"}, {"name": "d.xmp"}]
+
+
+def _stem(element) -> str:
+    return element["name"].split(".")[0]
+
+
+class TestKeyJoins:
+    @pytest.mark.parametrize("join", [inner, left, right, full_outer])
+    def test_matches_predicate_join(self, join):
+        by_key = list(join([1, 2, 3, 4, 5], [2, 4, 4, 6], left_key=lambda x: x % 10))
+        by_predicate = list(join([1, 2, 3, 4, 5], [2, 4, 4, 6], _eq))
+
+        assert sorted(by_key, key=repr) == sorted(by_predicate, key=repr)
+
+    @pytest.mark.parametrize("files, sidecars", [(_FILES, _SIDECARS), (_FILES[:1] * 5, _SIDECARS[:1])])
+    def test_build_side_does_not_change_result(self, files, sidecars):
+        forward = full_outer(files, sidecars, left_key=_stem, right_key=_stem)
+        backward = full_outer(sidecars, files, left_key=_stem, right_key=_stem)
+
+        assert sorted(map(repr, forward)) == sorted(repr((b, a)) for a, b in backward)
+
+    def test_unhashable_elements_and_duplicate_keys(self):
+        result = list(left(_FILES, _SIDECARS, left_key=_stem, right_key=_stem))
+
+        assert [(file["name"], sidecar and sidecar["name"]) for file, sidecar in result] == [
+            ("a.nef", "a.xmp"),
+            ("c.nef", "c.xmp"),
+            ("c.nef", "c.XMP"),
+            ("b.nef", None),
+        ]
+
+    def test_none_elements_are_kept(self):
+        assert list(inner([None], [None], left_key=lambda x: 0)) == [(None, None)]
+
+    def test_predicate_and_keys_are_exclusive(self):
+        with pytest.raises(AssertionError):
+            inner([1], [1], _eq, left_key=lambda x: x)
+
+
+class TestLazyJoins:
+    @pytest.mark.parametrize("keys", [{"left_key": abs}, {"on": lambda a, b: abs(a) == b}])
+    def test_probe_side_is_streamed(self, keys):
+        result = inner(itertools.count(-1, -1), [3, 1], **keys)
+
+        assert list(itertools.islice(result, 2)) == [(-1, 1), (-3, 3)]
+
+    @pytest.mark.parametrize("keys", [{"left_key": abs}, {"on": lambda a, b: abs(a) == b}])
+    def test_unmatched_build_side_comes_last(self, keys):
+        probe = iter([-1, -5])
+
+        assert list(full_outer(probe, [1, 2], **keys)) == [(-1, 1), (-5, None), (None, 2)]
+
+    def test_nothing_is_consumed_before_iteration(self):
+        consumed = []
+
+        result = left((consumed.append(x) or x for x in [1, 2]), [2], left_key=int)
+
+        assert consumed == []
+        assert next(result) == (1, None)
+
+    def test_chains_with_sequence(self):
+        names = Sequence.with_sequence(left(_FILES, _SIDECARS, left_key=_stem, right_key=_stem)) \
+            .map(lambda pair: pair[0]["name"]) \
+            .take(2) \
+            .to_list()
+
+        assert names == ["a.nef", "c.nef"]
+
+
+_KEYED_LEFT = [(1, "a"), (2, "b"), (2, "c"), (4, "d")]
+_KEYED_RIGHT = [(2, "x"), (2, "y"), (3, "z"), (4, "w")]
+
+
+def _first(pair):
+    return pair[0]
+
+
+class TestMergeJoin:
+    @pytest.mark.parametrize("mode, join", [
+        (JoinMode.INNER, inner),
+        (JoinMode.LEFT, left),
+        (JoinMode.RIGHT, right),
+        (JoinMode.FULL_OUTER, full_outer),
+    ])
+    def test_matches_hash_join(self, mode, join):
+        merged = list(merge_join(_KEYED_LEFT, _KEYED_RIGHT, left_key=_first, mode=mode))
+        hashed = list(join(_KEYED_LEFT, _KEYED_RIGHT, left_key=_first))
+
+        assert sorted(merged, key=repr) == sorted(hashed, key=repr)
+
+    def test_duplicate_keys_form_cross_product_in_order(self):
+        result = list(merge_join(_KEYED_LEFT, _KEYED_RIGHT, left_key=_first))
+
+        assert [(a[1], b[1]) for a, b in result] == [("b", "x"), ("b", "y"), ("c", "x"), ("c", "y"), ("d", "w")]
+
+    def test_streams_sorted_inputs(self):
+        result = merge_join(itertools.count(), itertools.count(0, 3), left_key=int)
+
+        assert list(itertools.islice(result, 3)) == [(0, 0), (3, 3), (6, 6)]
+
+    def test_unsorted_input_is_rejected(self):
+        with pytest.raises(ValueError):
+            list(merge_join([2, 1], [1, 2], left_key=int))
+
+    def test_external_sort_of_unsorted_inputs(self):
+        lefts = [5, 3, 9, 1, 7]
+        rights = [9, 2, 5, 5]
+
+        result = list(merge_join(lefts, rights, left_key=int, mode=JoinMode.FULL_OUTER, presorted=False, chunk_size=2))
+
+        assert result == [(1, None), (None, 2), (3, None), (5, 5), (5, 5), (7, None), (9, 9)]
+
+
+class TestWindowJoin:
+    def test_matches_quadratic_predicate(self):
+        rng = random.Random(1)
+        lefts = [rng.uniform(0, 100) for _ in range(200)]
+        rights = [rng.uniform(0, 100) for _ in range(300)]
+
+        windowed = window_join(lefts, rights, left_key=float, window=0.5, mode=JoinMode.FULL_OUTER)
+        brute = full_outer(lefts, rights, lambda a, b: abs(a - b) <= 0.5)
+
+        assert sorted(windowed, key=repr) == sorted(brute, key=repr)
+
+    def test_window_bounds_are_inclusive_and_left_order_is_kept(self):
+        result = list(window_join([10, 0], [8, 9, 12, 13], left_key=int, window=2, mode=JoinMode.LEFT))
+
+        assert result == [(10, 8), (10, 9), (10, 12), (0, None)]
+
+
+_TRACK = [(0, "p0"), (10, "p10"), (20, "p20")]
+
+
+class TestAsofJoin:
+    @pytest.mark.parametrize("direction, expected", [
+        (AsofDirection.BACKWARD, [None, "p0", "p10", "p20"]),
+        (AsofDirection.FORWARD, ["p0", "p10", "p20", None]),
+        (AsofDirection.NEAREST, ["p0", "p0", "p10", "p20"]),
+    ])
+    def test_directions(self, direction, expected):
+        result = asof_join([-1, 4, 14, 25], _TRACK, left_key=float, right_key=_first, direction=direction)
+
+        assert [point and point[1] for _, point in result] == expected
+
+    def test_tolerance(self):
+        result = asof_join([3, 9], _TRACK, left_key=float, right_key=_first, tolerance=2)
+
+        assert [point and point[1] for _, point in result] == [None, "p10"]
+
+    def test_empty_right_side(self):
+        assert list(asof_join([1], [], left_key=float)) == [(1, None)]
+
+
+_RAWS = ["a.nef", "b.nef", "c.nef"]
+_XMPS = ["a.xmp", "c.xmp"]
+_PREVIEWS = ["a.jpg", "a.JPG", "b.jpg"]
+_RATINGS = [("a", 5), ("c", 2)]
+
+
+def _name_stem(name: str) -> str:
+    return name.split(".")[0]
+
+
+class TestMultiJoin:
+    _KEYS = (_name_stem, _name_stem, _name_stem, _first)
+
+    def test_left_mode_keeps_every_first_element(self):
+        result = list(multi_join(_RAWS, _XMPS, _PREVIEWS, _RATINGS, keys=self._KEYS))
+
+        assert result == [
+            ("a.nef", "a.xmp", "a.jpg", ("a", 5)),
+            ("a.nef", "a.xmp", "a.JPG", ("a", 5)),
+            ("b.nef", None, "b.jpg", None),
+            ("c.nef", "c.xmp", None, ("c", 2)),
+        ]
+
+    def test_inner_mode_needs_every_input(self):
+        result = list(multi_join(_RAWS, _XMPS, _RATINGS, keys=(_name_stem, _name_stem, _first), mode=JoinMode.INNER))
+
+        assert result == [("a.nef", "a.xmp", ("a", 5)), ("c.nef", "c.xmp", ("c", 2))]
+
+    def test_single_key_matches_chained_joins(self):
+        pairs = left([1, 2, 3], [2, 3], left_key=int)
+        chained = [(a, b, c) for (a, b), c in left(pairs, [3, 3], left_key=_first, right_key=int)]
+
+        assert sorted(multi_join([1, 2, 3], [2, 3], [3, 3], keys=int), key=repr) == sorted(chained, key=repr)
+
+    def test_outer_modes_are_rejected(self):
+        with pytest.raises(AssertionError):
+            multi_join([1], [1], keys=int, mode=JoinMode.FULL_OUTER)
+
@@ -0,0 +1,86 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from justin_utils.scan_rules import (
+    ExtensionRule,
+    MtimeRule,
+    PatternRule,
+    ScanRules,
+    SizeRule,
+)
+
+
+def _entry(root, relative: str):
+    path = root / relative
+
+    with os.scandir(path.parent) as entries:
+        return next(entry for entry in entries if entry.name == path.name)
+
+
+class TestPatternRule:
+    @pytest.mark.parametrize("pattern, relative, expected", [
+        ("*.tmp", "a.tmp", True),
+        ("*.tmp", "sub/a.tmp", True),
+        ("*.tmp", "a.jpg", False),
+        ("sub/*.tmp", "sub/a.tmp", True),
+        ("sub/*.tmp", "other/sub/a.tmp", False),
+        ("/a.tmp", "sub/a.tmp", False),
+        ("**/a.tmp", "sub/a.tmp", True),
+        ("cache/", "cache", True),
+        ("cache/", "cache.tmp", False),
+        ("[!a]*.tmp", "b.tmp", True),
+        ("[!a]*.tmp", "a.tmp", False),
+        ("a[!b!]*", "a.tmp", True),
+        ("cache[.!]tmp", "cache.tmp", True),
+        ("[^a]*.tmp", "a.tmp", True),
+    ])
+    def test_matches(self, temp_dir, create_files, pattern, relative, expected):
+        create_files(temp_dir, {"a.tmp": None, "a.jpg": None, "b.tmp": None, "cache.tmp": None, "cache": {},
+                                "sub": {"a.tmp": None}, "other": {"sub": {"a.tmp": None}}})
+
+        assert PatternRule(pattern).matches(temp_dir.joinpath(relative).relative_to(temp_dir),
+                                            _entry(temp_dir, relative)) == expected
+
+
+class TestPredicateRules:
+    @pytest.mark.parametrize("rule, expected", [
+        (ExtensionRule([".JPG"]), True),
+        (ExtensionRule([".nef"]), False),
+        (SizeRule(min_size=4), True),
+        (SizeRule(max_size=3), False),
+        (MtimeRule(after=datetime.now() - timedelta(days=1)), True),  # noqa: DTZ005
+        (MtimeRule(before=datetime.now() - timedelta(days=1)), False),  # noqa: DTZ005
+    ])
+    def test_matches(self, temp_dir, create_files, rule, expected):
+        create_files(temp_dir, {"a.jpg": "abcd"})
+
+        assert rule.matches(temp_dir.joinpath("a.jpg").relative_to(temp_dir), _entry(temp_dir, "a.jpg")) == expected
+
+
+class TestScanRules:
+    @pytest.mark.parametrize("relative, expected", [
+        ("a.tmp", True),
+        ("keep.tmp", False),
+        ("a.jpg", False),
+        ("_meta.json", True),
+    ])
+    def test_last_matching_pattern_wins(self, temp_dir, create_files, relative, expected):
+        create_files(temp_dir, {"a.tmp": None, "keep.tmp": None, "a.jpg": None, "_meta.json": None})
+        rules = ScanRules.from_patterns(["# comment", "", "*.tmp", "!keep.tmp"])
+
+        assert rules.is_excluded(temp_dir.joinpath(relative).relative_to(temp_dir),
+                                 _entry(temp_dir, relative)) == expected
+
+    @pytest.mark.parametrize("relative, expected", [
+        ("a.jpg", False),
+        ("a.txt", True),
+        ("sub", False),
+    ])
+    def test_include_applies_to_files_only(self, temp_dir, create_files, relative, expected):
+        create_files(temp_dir, {"a.jpg": None, "a.txt": None, "sub": {}})
+        rules = ScanRules(include=[ExtensionRule([".jpg"])])
+
+        assert rules.is_excluded(temp_dir.joinpath(relative).relative_to(temp_dir),
+                                 _entry(temp_dir, relative)) == expected
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+from PIL import Image
+
+from justin_utils.filesystem import File
+from justin_utils.similarity import BKTree, SimilarityIndex, dhash, hamming, hash_image
+from justin_utils.sources import InternalMetadataSource
+
+
+def _gradient(size: tuple[int, int], flipped: bool = False) -> Image.Image:
+    width, height = size
+    image = Image.new("L", size)
+    image.putdata([(x * 255 // width + y * 64 // height) % 256 for y in range(height) for x in range(width)])
+
+    if flipped:
+        image = image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+
+    return image
+
+
+@pytest.fixture
+def images(temp_dir):
+    paths = {
+        "original": temp_dir / "original.jpg",
+        "resized": temp_dir / "resized.jpg",
+        "flipped": temp_dir / "flipped.jpg",
+    }
+
+    _gradient((640, 480)).convert("RGB").save(paths["original"], quality=90)
+    _gradient((320, 240)).convert("RGB").save(paths["resized"], quality=60)
+    _gradient((640, 480), flipped=True).convert("RGB").save(paths["flipped"], quality=90)
+
+    return paths
+
+
+class TestHashes:
+    def test_hamming(self):
+        assert hamming(0b1011, 0b0001) == 2
+
+    def test_dhash_is_64_bit_and_stable_across_scales(self):
+        assert hamming(dhash(_gradient((640, 480))), dhash(_gradient((64, 48)))) <= 2
+        assert dhash(_gradient((640, 480))) < 2 ** 64
+
+    def test_hash_image_survives_recompression(self, images):
+        assert hamming(hash_image(images["original"]), hash_image(images["resized"])) <= 4
+        assert hamming(hash_image(images["original"]), hash_image(images["flipped"])) > 16
+
+    def test_unreadable_file_has_no_hash(self, temp_dir):
+        path = temp_dir / "broken.jpg"
+        path.write_bytes(b"not an image")
+
+        assert hash_image(path) is None
+
+
+class TestBKTree:
+    def test_search_matches_linear_scan(self):
+        rng = random.Random(0)
+        keys = [rng.getrandbits(64) for _ in range(500)]
+        tree: BKTree[int] = BKTree()
+
+        for index, key in enumerate(keys):
+            tree.add(key, index)
+
+        query = keys[17] ^ 0b101
+
+        expected = sorted((hamming(query, key), index) for index, key in enumerate(keys) if hamming(query, key) <= 20)
+
+        assert len(tree) == 500
+        assert sorted(tree.search(query, 20)) == expected
+        assert tree.search(query, 2)[0] == (2, 17)
+
+    def test_empty_tree(self):
+        assert BKTree().search(0, 64) == []
+
+
+class TestSimilarityIndex:
+    def test_groups_near_duplicates(self, images, temp_dir):
+        broken = temp_dir / "broken.jpg"
+        broken.write_bytes(b"")
+        sources = {name: InternalMetadataSource(File(path)) for name, path in images.items()}
+        index = SimilarityIndex(workers=2)
+
+        skipped = index.add([*sources.values(), InternalMetadataSource(File(broken))])
+
+        assert [source.name for source in skipped] == ["broken"]
+        assert len(index) == 3
+        assert index.duplicates(4) == [[sources["original"], sources["resized"]]]
+
+    def test_neighbours_are_sorted_by_distance(self, images):
+        sources = [InternalMetadataSource(File(path)) for path in images.values()]
+        index = SimilarityIndex()
+        index.add(sources)
+
+        neighbours = index.neighbours(index.hash_of(sources[0]), 64)
+
+        assert neighbours[0] == (sources[0], 0)
+        assert [distance for _, distance in neighbours] == sorted(distance for _, distance in neighbours)
@@ -1,12 +1,26 @@
-from unittest.mock import patch
+import os
+from datetime import datetime, timedelta
+from typing import ClassVar
+from unittest.mock import MagicMock, patch
 
 import pytest
+from PIL import Image
 
-from justin_utils.filesystem import File
+from justin_utils import filesystem
+from justin_utils.filesystem import Durability, DurabilityPolicy, File, Folder
+from justin_utils.scan_rules import ScanRules
 from justin_utils.sources import (
     ExternalMetadataSource,
     InternalMetadataSource,
+    Source,
+    copy_sources,
+    discover_sources,
+    group_by_time,
+    iter_previews,
+    iter_sources,
+    move_sources,
     parse_sources,
+    prefetch_exif,
 )
 
 STEM = "photo"
@@ -53,6 +67,56 @@ class TestInternalMetadataSource:
             mock_parse.assert_called_once_with(file.path)
 
 
+class TestSourceDefaults:
+    def test_exif_path_defaults_to_first_file(self, temp_dir):
+        class LegacySource(Source):
+            def __init__(self, file: File) -> None:
+                super().__init__()
+
+                self.__file = file
+
+            @property
+            def mtime(self) -> float:
+                return self.__file.mtime
+
+            @property
+            def name(self) -> str:
+                return self.__file.stem
+
+            def files(self) -> list[File]:
+                return [self.__file]
+
+        file = _stemmed_file(temp_dir, STEM, ".nef")
+
+        assert LegacySource(file).exif_path == file.path
+
+
+class TestPrefetchExif:
+    def test_prefetched_exif_is_not_parsed_again(self, temp_dir):
+        sources = parse_sources([_stemmed_file(temp_dir, STEM, ".jpg"), _stemmed_file(temp_dir, OTHER_STEM, ".nef")])
+
+        exif = MagicMock()
+
+        with patch("justin_utils.exif.parse_exif", return_value=exif) as mock_batch_parse:
+            prefetch_exif(sources, workers=2)
+
+        with patch("justin_utils.sources.parse_exif") as mock_parse:
+            assert [source.exif for source in sources] == [exif, exif]
+
+            mock_parse.assert_not_called()
+
+        assert mock_batch_parse.call_count == 2
+
+    def test_failed_exif_is_left_unloaded(self, temp_dir):
+        [source] = parse_sources([_stemmed_file(temp_dir, STEM, ".jpg")])
+
+        with patch("justin_utils.exif.parse_exif", side_effect=ValueError):
+            prefetch_exif([source])
+
+        with patch("justin_utils.sources.parse_exif", return_value="exif-result"):
+            assert source.exif == "exif-result"
+
+
 class TestExternalMetadataSource:
     def test_name_is_raw_stem(self, temp_dir):
         raw = _stemmed_file(temp_dir, STEM, ".nef")
@@ -92,6 +156,23 @@ class TestExternalMetadataSource:
 
         assert source.mtime == -1
 
+    def test_xmp_reads_metadata_sidecar(self, temp_dir):
+        raw = _stemmed_file(temp_dir, STEM, ".nef")
+        metadata = _stemmed_file(temp_dir, STEM, ".xmp")
+
+        source = ExternalMetadataSource(raw, metadata)
+
+        with patch("justin_utils.sources.parse_xmp") as mock_parse:
+            mock_parse.return_value = "xmp-result"
+
+            assert source.xmp == "xmp-result"
+            mock_parse.assert_called_once_with(metadata.path)
+
+    def test_xmp_is_none_without_metadata(self, temp_dir):
+        source = ExternalMetadataSource(_stemmed_file(temp_dir, STEM, ".nef"), None)
+
+        assert source.xmp is None
+
     def test_jpg_raw_raises(self, temp_dir):
         raw = _stemmed_file(temp_dir, STEM, ".jpg")
 
@@ -149,3 +230,233 @@ class TestParseSources:
         assert len(sources) == 2
         names = {source.name for source in sources}
         assert names == {STEM, OTHER_STEM}
+
+    def test_multiple_sidecars_are_attached(self, temp_dir):
+        raw = _stemmed_file(temp_dir, STEM, ".NEF")
+        primary = _stemmed_file(temp_dir, STEM, ".xmp")
+        secondary = _stemmed_file(temp_dir, f"{STEM}.NEF", ".xmp")
+
+        [source] = parse_sources([secondary, raw, primary])
+
+        assert isinstance(source, ExternalMetadataSource)
+        assert source.metadata == primary
+        assert source.files() == [raw, primary, secondary]
+
+    def test_raw_named_sidecar_pairs_only_with_its_raw(self, temp_dir):
+        nef = _stemmed_file(temp_dir, STEM, ".nef")
+        arw = _stemmed_file(temp_dir, STEM, ".arw")
+        nef_sidecar = _stemmed_file(temp_dir, f"{STEM}.nef", ".xmp")
+
+        sources = parse_sources([nef, arw, nef_sidecar])
+
+        assert {source.raw: source.metadata for source in sources} == {nef: nef_sidecar, arw: None}
+
+    def test_stems_match_case_insensitively(self, temp_dir):
+        files = [_stemmed_file(temp_dir, STEM.upper(), ".nef"), _stemmed_file(temp_dir, STEM, ".xmp")]
+
+        [source] = parse_sources(files)
+
+        assert source.metadata is not None
+
+    def test_sidecar_in_other_folder_is_not_paired(self, temp_dir):
+        (temp_dir / "other").mkdir()
+        files = [_stemmed_file(temp_dir, STEM, ".nef"), _stemmed_file(temp_dir / "other", STEM, ".xmp")]
+
+        [source] = parse_sources(files)
+
+        assert source.metadata is None
+
+    def test_internal_sources_are_streamed(self, temp_dir):
+        def files():
+            yield _stemmed_file(temp_dir, STEM, ".jpg")
+
+            raise AssertionError("input consumed too early")
+
+        source = next(iter(iter_sources(files())))
+
+        assert isinstance(source, InternalMetadataSource)
+
+
+class TestGroupByTime:
+    _START = datetime(2024, 3, 15, 10, 0, 0)  # noqa: DTZ001
+
+    def _source(
+            self,
+            temp_dir,
+            name: str,
+            offset: timedelta | None,
+            utc_offset: timedelta | None = None,
+            camera: str | None = None
+    ) -> InternalMetadataSource:
+        source = InternalMetadataSource(_stemmed_file(temp_dir, name, ".jpg"))
+
+        if offset is None:
+            source.preload_exif(None)
+        else:
+            source.preload_exif(MagicMock(capture_time=self._START + offset, utc_offset=utc_offset, camera=camera))
+
+        return source
+
+    def test_splits_on_gaps(self, temp_dir):
+        offsets = {
+            "c": timedelta(seconds=10),
+            "a": timedelta(0),
+            "b": timedelta(milliseconds=400),
+            "d": timedelta(seconds=10, milliseconds=900),
+            "e": timedelta(hours=2),
+            "x": None,
+        }
+        sources = [self._source(temp_dir, name, offset) for name, offset in offsets.items()]
+
+        groups = group_by_time(sources, timedelta(seconds=1))
+
+        assert [[source.name for source in group] for group in groups] == [["a", "b"], ["c", "d"], ["e"], ["x"]]
+
+    def test_merges_cameras_across_offsets_and_clock_drift(self, temp_dir):
+        sources = [
+            # same moment: a phone on local time with its offset, and a camera left on utc but 30s slow
+            self._source(temp_dir, "phone", timedelta(hours=2), utc_offset=timedelta(hours=2)),
+            self._source(temp_dir, "camera", timedelta(seconds=-30), camera="Z 6_2"),
+            self._source(temp_dir, "later", timedelta(hours=1), camera="Z 6_2"),
+        ]
+
+        groups = group_by_time(sources, timedelta(seconds=5), clock_offsets={"Z 6_2": timedelta(seconds=30)})
+
+        assert [[source.name for source in group] for group in groups] == [["phone", "camera"], ["later"]]
+
+    def test_sub_second_gap(self, temp_dir):
+        sources = [
+            self._source(temp_dir, "a", timedelta(0)),
+            self._source(temp_dir, "b", timedelta(milliseconds=100)),
+            self._source(temp_dir, "c", timedelta(milliseconds=300)),
+        ]
+
+        groups = group_by_time(sources, timedelta(milliseconds=150))
+
+        assert [[source.name for source in group] for group in groups] == [["a", "b"], ["c"]]
+
+    def test_empty_input(self):
+        assert group_by_time([], timedelta(seconds=1)) == []
+
+
+class TestDiscoverSources:
+    _TREE: ClassVar = {
+        "a.nef": None,
+        "a.xmp": None,
+        "b.jpg": None,
+        "notes.txt": None,
+        ".DS_Store": None,
+        "day2": {"c.arw": None, "c.ARW.xmp": None, "cache": {"d.jpg": None}},
+        "day3": {"e.heic": None, "a.xmp": None},
+    }
+
+    def test_walks_tree_and_pairs_per_folder(self, temp_dir, create_files):
+        create_files(temp_dir, self._TREE)
+
+        sources = list(discover_sources(Folder(temp_dir)))
+
+        assert [source.name for source in sources] == ["b", "a", "c", "d", "e"]
+        assert [len(source.files()) for source in sources] == [1, 2, 2, 1, 1]
+        assert not (temp_dir / ".DS_Store").exists()
+
+    def test_excluded_folders_are_skipped(self, temp_dir, create_files):
+        create_files(temp_dir, self._TREE)
+
+        sources = discover_sources(Folder(temp_dir, ScanRules.from_patterns(["cache/"])))
+
+        assert "d" not in [source.name for source in sources]
+
+    def test_finds_the_files_folder_sees(self, temp_dir, create_files):
+        create_files(temp_dir, {"a.nef": None, "a.xmp": None, "notes.txt": None, ".DS_Store": None,
+                                "day2": {"c.jpg": None, "cache": {"d.jpg": None}}})
+        rules = ScanRules.from_patterns(["*.txt", "cache/"])
+
+        discovered = {file.path for source in discover_sources(Folder(temp_dir, rules)) for file in source.files()}
+
+        assert discovered == {file.path for file in Folder(temp_dir, rules).flatten()}
+
+    def test_sources_are_yielded_before_next_folder_is_scanned(self, temp_dir, create_files, monkeypatch):
+        create_files(temp_dir, self._TREE)
+        scanned = []
+        scandir = os.scandir
+
+        def spy(path):
+            scanned.append(path)
+
+            return scandir(path)
+
+        monkeypatch.setattr(filesystem.os, "scandir", spy)
+
+        next(discover_sources(Folder(temp_dir)))
+
+        assert scanned == [temp_dir]
+
+
+class TestBulkSourceTransfer:
+    def test_move_keeps_pairs_together_and_updates_paths(self, temp_dir, create_files):
+        create_files(temp_dir, {"src": {"a.nef": "a", "a.xmp": "x", "b.jpg": "b"}, "dst": {}})
+        sources = parse_sources(File(path) for path in sorted((temp_dir / "src").iterdir()))
+
+        failed = move_sources(sources, temp_dir / "dst", workers=2)
+
+        assert failed == {}
+        assert all(file.path.parent == temp_dir / "dst" for source in sources for file in source.files())
+        assert all(file.path.exists() for source in sources for file in source.files())
+        assert list((temp_dir / "src").iterdir()) == []
+
+    def test_failed_source_is_reported_and_left_in_place(self, temp_dir, create_files):
+        create_files(temp_dir, {"src": {"a.nef": "a", "a.xmp": "x", "b.jpg": "b"}, "dst": {"a.xmp": "old"}})
+        sources = parse_sources(File(path) for path in sorted((temp_dir / "src").iterdir()))
+        [raw] = [source for source in sources if source.name == "a"]
+
+        failed = move_sources(sources, temp_dir / "dst")
+
+        assert list(failed) == [raw]
+        assert [file.path.parent for file in raw.files()] == [temp_dir / "src"] * 2
+        assert (temp_dir / "src" / "a.nef").exists()
+
+    def test_partly_moved_source_follows_files_on_disk(self, temp_dir, create_files, monkeypatch):
+        monkeypatch.setattr(filesystem, "__get_mount", lambda path: path)
+        create_files(temp_dir, {"src": {"a.nef": "a", "a.xmp": "x"}, "dst": {}})
+        sources = parse_sources(File(path) for path in sorted((temp_dir / "src").iterdir()))
+        remove_file = filesystem.__dict__["__remove_file"]
+
+        def locked(path):
+            if path.suffix == ".xmp":
+                raise PermissionError(path)
+
+            remove_file(path)
+
+        monkeypatch.setattr(filesystem, "__remove_file", locked)
+
+        failed = move_sources(sources, temp_dir / "dst", durability=DurabilityPolicy(Durability.NONE))
+
+        assert isinstance(failed[sources[0]], PermissionError)
+        assert {file.path.suffix: file.path.parent for file in sources[0].files()} == {
+            ".nef": temp_dir / "dst",
+            ".xmp": temp_dir / "src",
+        }
+        assert all(file.path.exists() for file in sources[0].files())
+
+    def test_copy_leaves_sources_untouched(self, temp_dir, create_files):
+        create_files(temp_dir, {"src": {"a.nef": "a", "a.xmp": "x"}, "dst": {}})
+        sources = parse_sources(File(path) for path in sorted((temp_dir / "src").iterdir()))
+
+        assert copy_sources(sources, temp_dir / "dst") == {}
+        assert (temp_dir / "dst" / "a.xmp").read_text() == "x"
+        assert sources[0].files()[0].path.parent == temp_dir / "src"
+
+
+class TestPreviews:
+    def test_previews_come_from_exif_path(self, temp_dir):
+        Image.new("RGB", (8, 8)).save(temp_dir / "a.jpg")
+        (temp_dir / "b.nef").write_bytes(b"")
+        (temp_dir / "b.xmp").write_text("")
+        sources = parse_sources(File(path) for path in sorted(temp_dir.iterdir()))
+
+        previews = dict(iter_previews(sources, workers=2))
+
+        assert [source.name for source in previews] == ["a", "b"]
+        assert bytes(previews[sources[0]]) == (temp_dir / "a.jpg").read_bytes()
+        assert previews[sources[1]] is None
+        assert bytes(sources[0].preview()) == (temp_dir / "a.jpg").read_bytes()
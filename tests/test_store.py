@@ -0,0 +1,104 @@
+from unittest.mock import patch
+
+from justin_utils.filesystem import File
+from justin_utils.store import ArchiveStore, hash_file
+
+
+def _files(root, structure: dict[str, str]) -> list[File]:
+    files = []
+
+    for name, content in structure.items():
+        path = root / name
+        path.write_text(content)
+
+        files.append(File(path))
+
+    return files
+
+
+class TestArchiveStore:
+    def test_ingest_places_objects_by_hash(self, temp_dir):
+        card = temp_dir / "card"
+        card.mkdir()
+        [file] = _files(card, {"a.NEF": "a"})
+        store = ArchiveStore(temp_dir / "store")
+
+        digests = store.ingest([file])
+
+        digest = hash_file(file.path)
+        object_path = store.object_path(digest, ".nef")
+
+        assert digests == {file: digest}
+        assert object_path.read_text() == "a"
+        assert object_path.parent.name == digest[2:4]
+        assert object_path.parent.parent.name == digest[0:2]
+        assert file.path.exists()
+
+    def test_duplicates_are_stored_once(self, temp_dir):
+        card = temp_dir / "card"
+        card.mkdir()
+        files = _files(card, {"a.jpg": "same", "b.jpg": "same", "c.jpg": "other"})
+        store = ArchiveStore(temp_dir / "store")
+
+        store.ingest(files)
+
+        objects = [path for path in (temp_dir / "store" / "objects").rglob("*") if path.is_file()]
+
+        assert len(objects) == 2
+        assert not (temp_dir / "store" / "staging").exists()
+
+    def test_lookup_survives_reopen(self, temp_dir):
+        card = temp_dir / "card"
+        card.mkdir()
+        [file] = _files(card, {"a.jpg": "a"})
+
+        ArchiveStore(temp_dir / "store").ingest([file])
+
+        assert ArchiveStore(temp_dir / "store").lookup(file.path) == hash_file(file.path)
+        assert ArchiveStore(temp_dir / "store").lookup(card / "missing.jpg") is None
+
+    def test_reingest_skips_hashing_and_copying(self, temp_dir):
+        card = temp_dir / "card"
+        card.mkdir()
+        files = _files(card, {"a.jpg": "a", "b.jpg": "b"})
+
+        ArchiveStore(temp_dir / "store").ingest(files)
+
+        store = ArchiveStore(temp_dir / "store")
+
+        with patch("justin_utils.store.hash_file") as mock_hash, patch("justin_utils.store.copy") as mock_copy:
+            store.ingest(files)
+
+            mock_hash.assert_not_called()
+            mock_copy.assert_not_called()
+
+    def test_changed_file_is_rehashed(self, temp_dir):
+        card = temp_dir / "card"
+        card.mkdir()
+        [file] = _files(card, {"a.jpg": "a"})
+        store = ArchiveStore(temp_dir / "store")
+
+        store.ingest([file])
+        file.path.write_text("changed content")
+
+        digests = store.ingest([file])
+
+        assert digests[file] == hash_file(file.path)
+        assert store.lookup(file.path) == hash_file(file.path)
+
+    def test_staging_leftovers_do_not_block_ingest(self, temp_dir):
+        card = temp_dir / "card"
+        card.mkdir()
+        [file] = _files(card, {"a.jpg": "a"})
+        digest = hash_file(file.path)
+
+        for leftover in [f"staging/{digest}/a.jpg", f"staging/{digest}/{digest}.jpg", "staging/other/b.jpg"]:
+            path = temp_dir / "store" / leftover
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("partial")
+
+        store = ArchiveStore(temp_dir / "store")
+
+        assert store.ingest([file]) == {file: digest}
+        assert store.object_path(digest, ".jpg").read_text() == "a"
+        assert not (temp_dir / "store" / "staging").exists()
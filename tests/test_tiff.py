@@ -0,0 +1,88 @@
+import struct
+
+import pytest
+
+from justin_utils import tiff
+
+
+def _tiff(order: str, entries: list[tuple[int, int, int, bytes]]) -> bytes:
+    magic = b"II*\x00" if order == "<" else b"MM\x00*"
+    data_start = 8 + 2 + len(entries) * 12 + 4
+
+    directory = struct.pack(order + "H", len(entries))
+    extra = b""
+
+    for tag, type_, count, value in entries:
+        if len(value) <= 4:
+            directory += struct.pack(order + "HHI", tag, type_, count) + value.ljust(4, b"\x00")
+        else:
+            directory += struct.pack(order + "HHII", tag, type_, count, data_start + len(extra))
+            extra += value
+
+    return magic + struct.pack(order + "I", 8) + directory + struct.pack(order + "I", 0) + extra
+
+
+class TestReadTags:
+    @pytest.mark.parametrize("order", ["<", ">"])
+    def test_reads_inline_and_offset_values(self, order):
+        data = _tiff(order, [
+            (tiff.ORIENTATION, tiff.SHORT, 1, struct.pack(order + "H", 3)),
+            (tiff.MODEL, tiff.ASCII, 6, b"Z 6_2\x00"),
+            (0x011A, tiff.RATIONAL, 1, struct.pack(order + "II", 300, 1)),
+        ])
+
+        tags = tiff.read_tags(data, {tiff.ORIENTATION, tiff.MODEL, 0x011A})
+
+        assert tags == {tiff.ORIENTATION: 3, tiff.MODEL: "Z 6_2", 0x011A: 300.0}
+
+    def test_skips_unrequested_tags(self):
+        data = _tiff("<", [(tiff.ORIENTATION, tiff.SHORT, 1, struct.pack("<H", 3))])
+
+        assert tiff.read_tags(data, {tiff.MODEL}) == {}
+
+    @pytest.mark.parametrize("data", [
+        b"",
+        b"GIF89a",
+        b"II*\x00\x08\x00",
+        b"II*\x00\x08\x00\x00\x00\x05",
+    ])
+    def test_invalid_data_raises(self, data):
+        with pytest.raises(tiff.TiffError):
+            tiff.read_tags(data, {tiff.MODEL})
+
+
+def _with_jpeg(entries: list[tuple[int, int, int, bytes]], offset_tag: int, jpeg: bytes) -> bytes:
+    # every value is inline, so the directory size doesn't depend on the offset written into it
+    offset = 8 + 2 + (len(entries) + 1) * 12 + 4
+
+    return _tiff("<", [(offset_tag, tiff.LONG, 1, struct.pack("<I", offset)), *entries]) + jpeg
+
+
+class TestJpegRanges:
+    _JPEG = b"\xff\xd8preview\xff\xd9"
+
+    def test_finds_exif_thumbnail(self):
+        data = _with_jpeg([(tiff.JPEG_LENGTH, tiff.LONG, 1, struct.pack("<I", len(self._JPEG)))],
+                          tiff.JPEG_OFFSET, self._JPEG)
+
+        assert tiff.jpeg_ranges(data) == [(len(data) - len(self._JPEG), len(self._JPEG))]
+
+    @pytest.mark.parametrize("subfile_type, expected", [(1, 1), (0, 0)])
+    def test_strip_preview_needs_reduced_resolution(self, subfile_type, expected):
+        data = _with_jpeg([
+            (tiff.NEW_SUBFILE_TYPE, tiff.LONG, 1, struct.pack("<I", subfile_type)),
+            (tiff.COMPRESSION, tiff.SHORT, 1, struct.pack("<H", 6)),
+            (tiff.STRIP_BYTE_COUNTS, tiff.LONG, 1, struct.pack("<I", len(self._JPEG))),
+        ], tiff.STRIP_OFFSETS, self._JPEG)
+
+        assert len(tiff.jpeg_ranges(data)) == expected
+
+    def test_ignores_ranges_that_are_not_jpeg(self):
+        data = _with_jpeg([(tiff.JPEG_LENGTH, tiff.LONG, 1, struct.pack("<I", 8))], tiff.JPEG_OFFSET, b"not jpeg")
+
+        assert tiff.jpeg_ranges(data) == []
+
+    @pytest.mark.parametrize("data", [b"II*\x00", b"MM\x00*\x00\x00"])
+    def test_truncated_header_raises(self, data):
+        with pytest.raises(tiff.TiffError):
+            tiff.jpeg_ranges(data)
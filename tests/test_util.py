@@ -3,7 +3,7 @@ from unittest.mock import patch
 
 import pytest
 
-from justin_utils.util import parse_date
+from justin_utils.util import external_sorted, parse_date
 
 
 def _today_year() -> int:
@@ -34,3 +34,15 @@ class TestParseDate:
             result = parse_date(f"1.6.{two_digit_year:02d}")
 
         assert result == date(expected_year, 6, 1)
+
+
+class TestExternalSorted:
+    @pytest.mark.parametrize("chunk_size", [1, 3, 100])
+    def test_matches_sorted(self, chunk_size):
+        items = [(i * 7919) % 101 for i in range(50)]
+
+        assert list(external_sorted(items, chunk_size=chunk_size)) == sorted(items)
+
+    def test_key_and_empty_input(self):
+        assert list(external_sorted(["bb", "a", "ccc"], key=len, chunk_size=2)) == ["a", "bb", "ccc"]
+        assert list(external_sorted([], chunk_size=2)) == []
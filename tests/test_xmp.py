@@ -0,0 +1,106 @@
+import os
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+import pytest
+
+from justin_utils.xmp import XmpMetadata, parse_xmp, parse_xmp_batch
+
+_ATTRIBUTES_XMP = """<?xml version="1.0" encoding="UTF-8"?>
+<x:xmpmeta xmlns:x="adobe:ns:meta/">
+  <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+    <rdf:Description rdf:about=""
+        xmlns:xmp="http://ns.adobe.com/xap/1.0/"
+        xmlns:dc="http://purl.org/dc/elements/1.1/"
+        xmp:Rating="4"
+        xmp:Label="Red">
+      <dc:subject>
+        <rdf:Bag>
+          <rdf:li>wedding</rdf:li>
+          <rdf:li>ceremony</rdf:li>
+        </rdf:Bag>
+      </dc:subject>
+    </rdf:Description>
+  </rdf:RDF>
+</x:xmpmeta>
+"""
+
+_ELEMENTS_XMP = """<x:xmpmeta xmlns:x="adobe:ns:meta/">
+  <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+    <rdf:Description rdf:about="" xmlns:xmp="http://ns.adobe.com/xap/1.0/">
+      <xmp:Rating>2</xmp:Rating>
+    </rdf:Description>
+  </rdf:RDF>
+</x:xmpmeta>
+"""
+
+
+@pytest.fixture
+def sidecar(temp_dir):
+    path = temp_dir / "photo.xmp"
+    path.write_text(_ATTRIBUTES_XMP)
+
+    return path
+
+
+class TestParseXmp:
+    def test_reads_attributes_and_bags(self, sidecar):
+        metadata = parse_xmp(sidecar)
+
+        assert metadata.rating == 4
+        assert metadata.label == "Red"
+        assert metadata.keywords == ["wedding", "ceremony"]
+
+    def test_reads_element_values(self, temp_dir):
+        path = temp_dir / "photo.xmp"
+        path.write_text(_ELEMENTS_XMP)
+
+        metadata = parse_xmp(path)
+
+        assert metadata.rating == 2
+        assert metadata.label is None
+        assert metadata.keywords == []
+
+    def test_custom_fields(self, sidecar):
+        metadata = parse_xmp(sidecar, {"tags": "dc:subject"})
+
+        assert metadata == XmpMetadata({"tags": ["wedding", "ceremony"]})
+
+    def test_cached_result_is_read_only(self, sidecar):
+        metadata = parse_xmp(sidecar)
+
+        with pytest.raises(TypeError):
+            metadata.values["rating"] = "1"  # type: ignore[index]
+
+        metadata.keywords.append("changed")
+        metadata["keywords"].append("changed")
+
+        assert parse_xmp(sidecar).keywords == ["wedding", "ceremony"]
+
+    @pytest.mark.parametrize("rating, expected", [("4.0", 4), ("-1", -1), ("", None), ("high", None)])
+    def test_rating_formats(self, rating, expected):
+        assert XmpMetadata({"rating": rating}).rating == expected
+
+    def test_cached_until_mtime_changes(self, sidecar):
+        with patch("justin_utils.xmp.ElementTree.iterparse", wraps=ElementTree.iterparse) as mock_iterparse:
+            parse_xmp(sidecar)
+            parse_xmp(sidecar)
+
+            assert mock_iterparse.call_count == 1
+
+            sidecar.write_text(_ELEMENTS_XMP)
+            os.utime(sidecar, ns=(0, 0))
+
+            assert parse_xmp(sidecar).rating == 2
+            assert mock_iterparse.call_count == 2
+
+
+class TestParseXmpBatch:
+    def test_results_keep_order_and_isolate_errors(self, temp_dir, sidecar):
+        broken = temp_dir / "broken.xmp"
+        broken.write_text("<x:xmpmeta")
+
+        results = parse_xmp_batch([sidecar, temp_dir / "missing.xmp", broken], workers=2)
+
+        assert results[0].rating == 4
+        assert results[1:] == [None, None]